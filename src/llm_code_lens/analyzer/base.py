@@ -1,12 +1,68 @@
 from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AbstractSet, Any, Dict, Iterator, List, Optional
 from dataclasses import dataclass
+import hashlib
+import inspect
 import os
 import signal
+import sys
 import time
+from stat import S_ISREG
 from contextlib import contextmanager
 
+from ..utils.cache import AnalysisCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+# Common entry point file names
+ENTRY_POINT_FILENAMES = frozenset({
+    'main.py', 'app.py', 'server.py', 'cli.py', 'run.py',
+    'index.js', 'app.js', 'server.js', 'main.js'
+})
+
+# Directories never descended into when collecting files (hidden ones are skipped too)
+_IGNORED_DIR_NAMES = frozenset({
+    'node_modules', '__pycache__', 'venv', 'env', 'dist', 'build'
+})
+
+def _scandir_recursive(root: str, extensions: AbstractSet[str]) -> Iterator[Path]:
+    """Yield files under root whose suffix is in extensions, in os.walk order.
+
+    DirEntry type information comes from the directory read itself, so no
+    extra stat() is paid per entry. Ignored directories are pruned by name
+    before descending, and symlinked directories are not followed.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+
+        if is_dir:
+            name = entry.name
+            if (not name.startswith('.') and name not in _IGNORED_DIR_NAMES
+                    and not entry.is_symlink()):
+                subdirs.append(entry.path)
+        elif os.path.splitext(entry.name)[1].lower() in extensions:
+            yield Path(entry.path)
+
+    # Like os.walk (top-down), a directory's files come before its subdirectories
+    for subdir in subdirs:
+        yield from _scandir_recursive(subdir, extensions)
+
 @contextmanager
 def timeout(duration):
     """Context manager for timing out operations."""
@@ -25,6 +81,12 @@ def timeout(duration):
         # On Windows, just yield without timeout
         yield
 
+def _json_default(obj: Any) -> list:
+    """Serialize sets left in the summary (imports, directories) as lists."""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 @dataclass
 class AnalysisResult:
     """Container for analysis results."""
@@ -49,7 +111,16 @@ class AnalysisResult:
         }
         if self.configuration:
             data['configuration'] = self.configuration
-        return json.dumps(data, indent=2)
+        if orjson is not None:
+            try:
+                return orjson.dumps(
+                    data, default=_json_default,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                ).decode('utf-8')
+            except orjson.JSONEncodeError:
+                pass  # e.g. integers wider than 64 bits; the stdlib encoder handles them
+        # ensure_ascii=False matches orjson, so the output doesn't depend on which backend ran
+        return json.dumps(data, indent=2, default=_json_default, ensure_ascii=False)
 
 class BaseAnalyzer(ABC):
     """Base class for all code analyzers."""
@@ -92,23 +163,20 @@ class ProjectAnalyzer:
 
     def __init__(self):
         self.analyzers = self._initialize_analyzers()
+        self.jobs = 1  # Worker processes used by analyze()
+        self.cache: Optional[AnalysisCache] = None  # Reused results of unchanged files
 
     def _initialize_analyzers(self) -> Dict[str, BaseAnalyzer]:
         """Initialize analyzers for different file types."""
-        from .python import PythonAnalyzer
-        from .javascript import JavaScriptAnalyzer
-        from .sql import SQLServerAnalyzer
-
-        analyzers = {
-            '.py': PythonAnalyzer(),
-            '.js': JavaScriptAnalyzer(),
-            '.jsx': JavaScriptAnalyzer(),
-            '.ts': JavaScriptAnalyzer(),
-            '.tsx': JavaScriptAnalyzer(),
-            '.sql': SQLServerAnalyzer(),
-        }
-
-        return analyzers
+        return {ext: analyzer_class() for ext, analyzer_class in _stock_analyzer_classes().items()}
+
+    def _uses_stock_analyzers(self) -> bool:
+        """True if self.analyzers is the default mapping, which worker processes can rebuild."""
+        stock = _stock_analyzer_classes()
+        return self.analyzers.keys() == stock.keys() and all(
+            type(analyzer) is stock[ext] and 'analyze_file' not in vars(analyzer)
+            for ext, analyzer in self.analyzers.items()
+        )
 
     def analyze(self, path: Path) -> AnalysisResult:
         """Analyze entire project directory."""
@@ -166,18 +234,31 @@ class ProjectAnalyzer:
             if verbose:
                 print(f"DEBUG: Progress task created for {len(files_to_analyze)} files")
 
-        for file_path in files_to_analyze:
-            if not file_path.is_file():
-                if verbose:
-                    print(f"DEBUG: Skipping non-file: {file_path}")
-                continue
+        # One stat per file: it filters out non-files and unreadable paths and
+        # supplies the (mtime, size) the cache is keyed on
+        file_stats = self._stat_files(files_to_analyze, verbose)
+
+        # Reuse cached results for files unchanged since the last run
+        cache = self.cache
+        cached_results = cache.load(files_to_analyze, file_stats) if cache is not None else {}
+        if verbose and cache is not None:
+            print(f"DEBUG: Reusing cached analysis for {len(cached_results)} files")
+
+        # Analyze files in worker processes up front when more than one job is requested
+        jobs = self.jobs
+        parallel_results = None
+        pending = [f for f in files_to_analyze if f in file_stats and f not in cached_results]
+        if jobs > 1 and len(pending) > 1:
+            if self._uses_stock_analyzers():
+                parallel_results = self._analyze_files_parallel(pending, jobs)
+            elif verbose:
+                print("DEBUG: Custom analyzers are registered - analyzing in a single process")
+
+        # File type counts are tallied in a Counter and stored as a plain dict once
+        files_by_type: Counter[str] = Counter()
 
-            # Check if file is accessible
-            try:
-                file_path.stat()
-            except (OSError, PermissionError) as e:
-                if verbose:
-                    print(f"DEBUG: Cannot access file {file_path}: {e}")
+        for file_path in files_to_analyze:
+            if file_path not in file_stats:
                 continue
 
             analyzer = self.analyzers.get(file_path.suffix.lower())
@@ -189,12 +270,23 @@ class ProjectAnalyzer:
 
                     # Add timeout for large/complex files
                     try:
-                        with timeout(30):  # 30 second timeout per file
-                            file_analysis = analyzer.analyze_file(file_path)
+                        if file_path in cached_results:
+                            file_analysis = cached_results[file_path]
+                        elif parallel_results is not None:
+                            # Already analyzed in a worker; re-raise its failure here
+                            file_analysis, error = parallel_results[file_path]
+                            if error is not None:
+                                raise error
+                        else:
+                            with timeout(30):  # 30 second timeout per file
+                                file_analysis = analyzer.analyze_file(file_path)
                     except TimeoutError:
                         print(f"WARNING: Analysis of {file_path} timed out after 30 seconds - skipping")
                         continue
 
+                    if cache is not None and file_path not in cached_results:
+                        cache.store(file_path, file_analysis)
+
                     str_path = str(file_path)
 
                     # Validate analysis
@@ -210,9 +302,7 @@ class ProjectAnalyzer:
                         continue
 
                     # Update file types count
-                    ext = file_path.suffix
-                    analysis['summary']['project_stats']['by_type'][ext] = \
-                        analysis['summary']['project_stats']['by_type'].get(ext, 0) + 1
+                    files_by_type[file_path.suffix] += 1
 
                     # Store file analysis
                     analysis['files'][str_path] = file_analysis
@@ -232,7 +322,8 @@ class ProjectAnalyzer:
                         print(traceback.format_exc())
                     continue
 
-        # Update final count
+        # Update final counts
+        analysis['summary']['project_stats']['by_type'] = dict(files_by_type)
         analysis['summary']['project_stats']['total_files'] = processed_files
 
         # Debug: Show completion stats
@@ -276,6 +367,80 @@ class ProjectAnalyzer:
 
         return AnalysisResult(**analysis)
 
+    def _stat_files(self, files: List[Path], verbose: bool = False) -> Dict[Path, os.stat_result]:
+        """Stat each file once, keeping only accessible regular files."""
+        file_stats: Dict[Path, os.stat_result] = {}
+        for file_path in files:
+            # Check if file is accessible
+            try:
+                st = os.stat(file_path)
+            except OSError as e:
+                if verbose:
+                    print(f"DEBUG: Cannot access file {file_path}: {e}")
+                continue
+            if not S_ISREG(st.st_mode):
+                if verbose:
+                    print(f"DEBUG: Skipping non-file: {file_path}")
+                continue
+            file_stats[file_path] = st
+        return file_stats
+
+    def cache_fingerprint(self) -> str:
+        """Identify the analyzers in use and their code.
+
+        Cached results are only valid for the analyzers that produced them: a
+        different class, parsing backend (tree-sitter or ast) or edited
+        analyzer module changes the fingerprint.
+        """
+        digest = hashlib.sha256()
+        modules = set()
+        for ext in sorted(self.analyzers):
+            analyzer = self.analyzers[ext]
+            analyzer_class = type(analyzer)
+            modules.add(analyzer_class.__module__)
+            backend = getattr(analyzer, 'tree_sitter_enabled', None)
+            digest.update(f"{ext}:{analyzer_class.__module__}.{analyzer_class.__qualname__}:{backend}\n".encode())
+
+        for module_name in sorted(modules):
+            try:
+                source_file = inspect.getsourcefile(sys.modules[module_name])
+                source = Path(source_file).read_bytes() if source_file else None
+            except (KeyError, TypeError, OSError):
+                source = None
+            digest.update(source if source is not None else module_name.encode())
+        return digest.hexdigest()
+
+    def _analyze_files_parallel(self, files: List[Path], jobs: int) -> Optional[Dict[Path, tuple]]:
+        """Analyze files in a process pool, returning {path: (analysis, error)}.
+
+        Workers build their own analyzers, so callers only use this when
+        _uses_stock_analyzers() holds. Returns None if the pool cannot be used,
+        in which case the caller analyzes files sequentially.
+        """
+        supported = [f for f in files if f.suffix.lower() in self.analyzers]
+        if not supported:
+            return {}
+
+        progress = getattr(self, 'progress', None)
+        if progress is not None:
+            pool_task = progress.add_task(f"Analyzing files ({jobs} workers)...", total=len(supported))
+
+        chunksize = max(1, len(supported) // (jobs * 4))
+        results = {}
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                # map yields in submission order; advance progress as results arrive
+                for file_path, result in zip(supported, executor.map(
+                        _analyze_file_in_worker, supported, chunksize=chunksize)):
+                    results[file_path] = result
+                    if progress is not None:
+                        progress.update(pool_task, advance=1, description=f"Analyzing: {file_path.name}")
+        except Exception as e:
+            print(f"WARNING: Parallel analysis failed ({e}) - falling back to a single process")
+            return None
+
+        return results
+
     def _collect_files(self, path: Path) -> List[Path]:
         """Collect files to analyze with limits for large repositories."""
         files = []
@@ -283,30 +448,15 @@ class ProjectAnalyzer:
         max_files = 5000  # Limit for large repositories
         verbose = getattr(self, 'verbose', False)
 
-        for root, dirs, filenames in os.walk(str(path)):
+        for file_path in _scandir_recursive(str(path), supported_extensions):
             # Stop if we've reached the file limit
             if len(files) >= max_files:
                 print(f"WARNING: Reached file limit of {max_files} files. Consider using more specific include/exclude patterns.")
                 break
-
-            # Skip common ignored directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {
-                'node_modules', '__pycache__', 'venv', 'env', 'dist', 'build'
-            }]
-
-            root_path = Path(root)
-            for filename in filenames:
-                if len(files) >= max_files:
-                    break
-
-                file_path = root_path / filename
-
-                if file_path.suffix.lower() in supported_extensions:
-                    files.append(file_path)
+            files.append(file_path)
 
         if verbose:
             print(f"DEBUG: Found {len(files)} files to analyze")
-            from collections import Counter
             extensions = Counter(f.suffix for f in files)
             print(f"DEBUG: File types: {dict(extensions)}")
 
@@ -314,45 +464,59 @@ class ProjectAnalyzer:
 
     def _update_metrics(self, analysis: dict, file_analysis: dict, file_path: str) -> None:
         """Update project metrics with file analysis results."""
+        summary = analysis['summary']
+        code_metrics = summary['code_metrics']
+        structure = summary['structure']
         metrics = file_analysis.get('metrics', {})
 
         # Update basic metrics
-        analysis['summary']['project_stats']['lines_of_code'] += metrics.get('loc', 0)
-
-        # Update function metrics
-        functions = file_analysis.get('functions', [])
-        analysis['summary']['code_metrics']['functions']['count'] += len(functions)
-        analysis['summary']['code_metrics']['functions']['with_docs'] += \
-            sum(1 for f in functions if f.get('docstring'))
-        analysis['summary']['code_metrics']['functions']['complex'] += \
-            sum(1 for f in functions if f.get('complexity', 0) > 5)
+        summary['project_stats']['lines_of_code'] += metrics.get('loc', 0)
+
+        # Update function metrics - one pass collects docs, complexity and
+        # the main-function check used for entry point detection
+        functions = file_analysis.get('functions', ())
+        with_docs = complex_count = 0
+        has_main = False
+        for func in functions:
+            if func.get('docstring'):
+                with_docs += 1
+            if func.get('complexity', 0) > 5:
+                complex_count += 1
+            if not has_main and 'main' in func.get('name', '').lower():
+                has_main = True
+        function_metrics = code_metrics['functions']
+        function_metrics['count'] += len(functions)
+        function_metrics['with_docs'] += with_docs
+        function_metrics['complex'] += complex_count
 
         # Update class metrics
-        classes = file_analysis.get('classes', [])
-        analysis['summary']['code_metrics']['classes']['count'] += len(classes)
-        analysis['summary']['code_metrics']['classes']['with_docs'] += \
-            sum(1 for c in classes if c.get('docstring'))
+        classes = file_analysis.get('classes', ())
+        class_metrics = code_metrics['classes']
+        class_metrics['count'] += len(classes)
+        class_metrics['with_docs'] += sum(1 for c in classes if c.get('docstring'))
 
         # Update imports
-        imports = file_analysis.get('imports', [])
-        analysis['summary']['code_metrics']['imports']['count'] += len(imports)
-        analysis['summary']['code_metrics']['imports']['unique'].update(imports)
+        imports = file_analysis.get('imports', ())
+        code_metrics['imports']['count'] += len(imports)
+        code_metrics['imports']['unique'].update(imports)
 
-        # Update structure info
-        dir_path = str(Path(file_path).parent)
-        analysis['summary']['structure']['directories'].add(dir_path)
+        # Update structure info - dirname avoids building a Path per file;
+        # "." keeps the Path(...).parent spelling for top-level files
+        dir_path = os.path.dirname(file_path) or '.'
+        structure['directories'].add(dir_path)
 
         # Check for entry points
-        if self._is_entry_point(file_path, file_analysis):
-            analysis['summary']['structure']['entry_points'].append(file_path)
+        if self._is_entry_point(file_path, file_analysis, has_main):
+            structure['entry_points'].append(file_path)
 
         # Check for core files
         if self._is_core_file(file_analysis):
-            analysis['summary']['structure']['core_files'].append(file_path)
+            structure['core_files'].append(file_path)
 
         # Update TODOs
-        for todo in file_analysis.get('todos', []):
-            analysis['summary']['maintenance']['todos'].append({
+        todos = summary['maintenance']['todos']
+        for todo in file_analysis.get('todos', ()):
+            todos.append({
                 'file': file_path,
                 'line': todo.get('line', 0),
                 'text': todo.get('text', ''),
@@ -385,25 +549,22 @@ class ProjectAnalyzer:
         analysis['summary']['structure']['directories'] = \
             list(analysis['summary']['structure']['directories'])
 
-    def _is_entry_point(self, file_path: str, analysis: dict) -> bool:
-        """Identify if a file is a potential entry point."""
-        filename = Path(file_path).name.lower()
-        
-        # Common entry point patterns
-        entry_patterns = [
-            'main.py', 'app.py', 'server.py', 'cli.py', 'run.py',
-            'index.js', 'app.js', 'server.js', 'main.js'
-        ]
-        
-        if filename in entry_patterns:
+    def _is_entry_point(self, file_path: str, analysis: dict, has_main: Optional[bool] = None) -> bool:
+        """Identify if a file is a potential entry point.
+
+        ``has_main`` can be passed when the caller already scanned the functions.
+        """
+        filename = os.path.basename(file_path).lower()
+
+        if filename in ENTRY_POINT_FILENAMES:
             return True
         
         # Check for main functions
-        functions = analysis.get('functions', [])
-        if any('main' in func.get('name', '').lower() for func in functions):
-            return True
-            
-        return False
+        if has_main is None:
+            functions = analysis.get('functions', [])
+            has_main = any('main' in func.get('name', '').lower() for func in functions)
+
+        return has_main
 
     def _is_core_file(self, analysis: dict) -> bool:
         """Identify if a file is likely a core component."""
@@ -506,3 +667,39 @@ class ProjectAnalyzer:
                 break
 
         return config_files
+
+def _stock_analyzer_classes() -> Dict[str, type]:
+    """Default analyzer class for each supported file extension."""
+    from .python import PythonAnalyzer
+    from .javascript import JavaScriptAnalyzer
+    from .sql import SQLServerAnalyzer
+
+    return {
+        '.py': PythonAnalyzer,
+        '.js': JavaScriptAnalyzer,
+        '.jsx': JavaScriptAnalyzer,
+        '.ts': JavaScriptAnalyzer,
+        '.tsx': JavaScriptAnalyzer,
+        '.sql': SQLServerAnalyzer,
+    }
+
+# Analyzers of a worker process in parallel runs, created on first use
+_worker_analyzers: Optional[Dict[str, 'BaseAnalyzer']] = None
+
+def _analyze_file_in_worker(file_path: Path) -> tuple:
+    """Analyze one file in a worker process, returning (analysis, error).
+
+    Errors are returned rather than raised so one bad file doesn't abort the
+    whole map; anything that may not pickle is wrapped in a RuntimeError.
+    """
+    global _worker_analyzers
+    if _worker_analyzers is None:
+        _worker_analyzers = {ext: analyzer_class() for ext, analyzer_class in _stock_analyzer_classes().items()}
+
+    try:
+        with timeout(30):  # 30 second timeout per file
+            return _worker_analyzers[file_path.suffix.lower()].analyze_file(file_path), None
+    except TimeoutError as e:
+        return None, e
+    except Exception as e:
+        return None, RuntimeError(str(e))
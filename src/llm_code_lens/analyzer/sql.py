@@ -3,6 +3,10 @@ from typing import Dict, List, Optional
 from .base import BaseAnalyzer
 import re
 
+# Control-flow and join keywords counted towards file complexity. The words
+# cannot overlap, so one alternation finds the same matches as one scan each
+_COMPLEXITY_KEYWORDS = re.compile(r'\b(?:IF|WHILE|CASE|TRY|CATCH|JOIN)\b', re.IGNORECASE)
+
 class SQLServerAnalyzer(BaseAnalyzer):
     """SQL Server code analyzer with regex-based parsing."""
     
@@ -340,32 +344,22 @@ class SQLServerAnalyzer(BaseAnalyzer):
     
     def _calculate_complexity(self, content: str) -> int:
         """Calculate overall complexity of SQL file."""
-        complexity = 0
-        
-        # Count control flow statements
-        complexity += len(re.findall(r'\bIF\b', content, re.IGNORECASE))
-        complexity += len(re.findall(r'\bWHILE\b', content, re.IGNORECASE))
-        complexity += len(re.findall(r'\bCASE\b', content, re.IGNORECASE))
-        complexity += len(re.findall(r'\bTRY\b', content, re.IGNORECASE))
-        complexity += len(re.findall(r'\bCATCH\b', content, re.IGNORECASE))
-        
-        # Count joins (complexity indicators)
-        complexity += len(re.findall(r'\bJOIN\b', content, re.IGNORECASE))
-        
-        return complexity
+        # Count control flow statements and joins (complexity indicators)
+        return sum(1 for _ in _COMPLEXITY_KEYWORDS.finditer(content))
     
     def _calculate_block_complexity(self, body: str) -> int:
         """Calculate complexity of a specific SQL block."""
         complexity = 1  # Base complexity
+        upper_body = body.upper()
         
         # Count control flow statements
-        complexity += body.upper().count('IF ')
-        complexity += body.upper().count('WHILE ')
-        complexity += body.upper().count('CASE ')
-        complexity += body.upper().count('TRY')
-        complexity += body.upper().count('CATCH')
-        complexity += body.upper().count('JOIN ')
-        complexity += body.upper().count('UNION')
-        complexity += body.upper().count('EXISTS')
+        complexity += upper_body.count('IF ')
+        complexity += upper_body.count('WHILE ')
+        complexity += upper_body.count('CASE ')
+        complexity += upper_body.count('TRY')
+        complexity += upper_body.count('CATCH')
+        complexity += upper_body.count('JOIN ')
+        complexity += upper_body.count('UNION')
+        complexity += upper_body.count('EXISTS')
         
         return complexity
\ No newline at end of file
@@ -5,6 +5,7 @@ Handles command-line interface and coordination of analysis components.
 """
 
 import click
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Union, Optional
 from rich.console import Console
@@ -13,6 +14,7 @@ from .analyzer.base import ProjectAnalyzer, AnalysisResult
 from .analyzer.sql import SQLServerAnalyzer
 from .version import check_for_newer_version
 from .utils.gitignore import GitignoreParser  # Added this line
+from .utils.cache import AnalysisCache, ANALYSIS_CACHE_FILE
 import tiktoken
 import traceback
 import os
@@ -42,90 +44,83 @@ def parse_ignore_file(ignore_file: Path) -> List[str]:
 
     return patterns
 
-def should_ignore(path: Path, ignore_patterns: Optional[List[str]] = None, gitignore_parser: Optional['GitignoreParser'] = None) -> bool:
-    """Determine if a file or directory should be ignored based on patterns and gitignore."""
-    if ignore_patterns is None:
-        ignore_patterns = []
-
-    path_str = str(path)
-
-    # First check gitignore patterns if parser is provided
-    if gitignore_parser and gitignore_parser.should_ignore(path):
-        return True
+# Default ignores, matched as plain substrings of the path string. Every
+# path part is a substring of str(path), so one scan of the string covers
+# both the name and the parts. Built once; duplicates are dropped.
+_DEFAULT_IGNORES = tuple(dict.fromkeys([
+    # Version control and cache directories
+    '.git', '__pycache__', '.pytest_cache', '.idea', '.vscode',
+    '.vscode-test', '.nyc_output', '.ipynb_checkpoints', '.tox',
 
-    # Then check default ignores and custom patterns (existing logic)
-    default_ignores = {
-        # Version control and cache directories
-        '.git', '__pycache__', '.pytest_cache', '.idea', '.vscode',
-        '.vscode-test', '.nyc_output', '.ipynb_checkpoints', '.tox',
+    # Language/framework specific directories
+    'node_modules', 'venv', 'env', 'dist', 'build', 'htmlcov',
+    '.next', 'next-env.d.ts', 'bin', 'obj', 'DerivedData',
+    'vendor', '.bundle', 'target', 'blib', 'pm_to_blib',
+    '.dart_tool', 'pkg', 'out', 'coverage',
 
-        # Language/framework specific directories
-        'node_modules', 'venv', 'env', 'dist', 'build', 'htmlcov',
-        '.next', 'next-env.d.ts', 'bin', 'obj', 'DerivedData',
-        'vendor', '.bundle', 'target', 'blib', 'pm_to_blib',
-        '.dart_tool', 'pkg', 'out', 'coverage',
+    # Package lock files
+    'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml',
+    'Gemfile.lock', 'composer.lock', 'composer.json',
 
-        # Package lock files
-        'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml',
-        'Gemfile.lock', 'composer.lock', 'composer.json',
+    # Config files
+    'tsconfig.json', 'jsconfig.json',
 
-        # Config files
-        'tsconfig.json', 'jsconfig.json',
+    # System files
+    '.DS_Store',
 
-        # System files
-        '.DS_Store',
+    # Log files
+    '*.log', 'npm-debug.log', 'yarn-error.log',
 
-        # Log files
-        '*.log', 'npm-debug.log', 'yarn-error.log',
+    # Temp/backup files
+    '*.tmp', '*.bak', '*.swp', '*.swo', '*.orig',
 
-        # Temp/backup files
-        '*.tmp', '*.bak', '*.swp', '*.swo', '*.orig',
+    # Binary and compiled files
+    '*.exe', '*.dll', '*.so', '*.dylib', '*.a', '*.o', '*.obj',
+    '*.pdb', '*.idb', '*.ilk', '*.map', '*.ncb', '*.sdf', '*.opensdf',
+    '*.lib', '*.class', '*.jar', '*.war', '*.ear', '*.pyc', '*.pyo', '*.pyd',
+    '*.py[cod]', '*$py.class', '*.whl', '*.mexw64', '*.test', '*.out',
+    '*.rs.bk', '*.build',
 
-        # Binary and compiled files
-        '*.exe', '*.dll', '*.so', '*.dylib', '*.a', '*.o', '*.obj',
-        '*.pdb', '*.idb', '*.ilk', '*.map', '*.ncb', '*.sdf', '*.opensdf',
-        '*.lib', '*.class', '*.jar', '*.war', '*.ear', '*.pyc', '*.pyo', '*.pyd',
-        '*.py[cod]', '*$py.class', '*.whl', '*.mexw64', '*.test', '*.out',
-        '*.rs.bk', '*.build',
+    # Document build files
+    '*.aux', '*.toc', '*.out', '*.dvi', '*.ps', '*.pdf', '*.lof', '*.lot',
+    '*.fls', '*.fdb_latexmk', '*.synctex.gz',
 
-        # Document build files
-        '*.aux', '*.toc', '*.out', '*.dvi', '*.ps', '*.pdf', '*.lof', '*.lot',
-        '*.fls', '*.fdb_latexmk', '*.synctex.gz',
+    # Source files that shouldn't normally be ignored
+    '*.go',
 
-        # Source files that shouldn't normally be ignored
-        '*.go',
+    # Project files
+    '*.csproj', '*.user', '*.suo', '*.sln.docstates', '*.xcodeproj', '*.xcworkspace',
 
-        # Project files
-        '*.csproj', '*.user', '*.suo', '*.sln.docstates', '*.xcodeproj', '*.xcworkspace',
+    # CSS files
+    '*.css.map', '*.min.css',
 
-        # CSS files
-        '*.css.map', '*.min.css',
+    # R files
+    '.Rhistory', '.RData', '*.Rout',
 
-        # R files
-        '.Rhistory', '.RData', '*.Rout',
+    # Utility files
+    'pnp.loader.mjs'
+]))
 
-        # Utility files
-        'pnp.loader.mjs'
-    }
+def should_ignore(path: Path, ignore_patterns: Optional[List[str]] = None, gitignore_parser: Optional['GitignoreParser'] = None) -> bool:
+    """Determine if a file or directory should be ignored based on patterns and gitignore."""
+    path_str = str(path)
 
-    # Check if the path is a directory and should be ignored
-    if path.is_dir():
-        for pattern in default_ignores:
-            if pattern in path.name or any(pattern in part for part in path.parts):
-                return True
+    # First check gitignore patterns if parser is provided
+    if gitignore_parser and gitignore_parser.should_ignore(path):
+        return True
 
-    # Check default ignores
-    for pattern in default_ignores:
-        if pattern in path_str or any(pattern in part for part in path.parts):
-            return True
+    # Then check default ignores
+    if any(pattern in path_str for pattern in _DEFAULT_IGNORES):
+        return True
 
     # Check custom ignore patterns
-    for pattern in ignore_patterns:
-        # Skip gitignore patterns (they're handled above)
-        if pattern.startswith('!') or '/' in pattern or '*' in pattern:
-            continue
-        if pattern in path_str or any(pattern in part for part in path.parts):
-            return True
+    if ignore_patterns:
+        for pattern in ignore_patterns:
+            # Skip gitignore patterns (they're handled above)
+            if pattern.startswith('!') or '/' in pattern or '*' in pattern:
+                continue
+            if pattern in path_str:
+                return True
 
     return False
 
@@ -140,7 +135,21 @@ def is_binary(file_path: Path) -> bool:
         return True
     return False
 
-def split_content_by_tokens(content: str, chunk_size: int = 100000) -> List[str]:
+@lru_cache(maxsize=4)
+def _get_encoder(name: str = "cl100k_base") -> Optional[tiktoken.Encoding]:
+    """
+    Load a tiktoken encoding once per process.
+
+    Failures are cached too (as None): without network access tiktoken would
+    otherwise retry the download for every file exported with --full.
+    """
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+def split_content_by_tokens(content: str, chunk_size: int = 100000,
+                            encoder: Optional[tiktoken.Encoding] = None) -> List[str]:
     """
     Split content into chunks based on token count.
     Handles large content safely by pre-chunking before tokenization.
@@ -148,6 +157,7 @@ def split_content_by_tokens(content: str, chunk_size: int = 100000) -> List[str]
     Args:
         content (str): The content to split
         chunk_size (int): Target size for each chunk in tokens
+        encoder: Optional already-loaded tiktoken encoding to reuse
 
     Returns:
         List[str]: List of content chunks
@@ -156,25 +166,32 @@ def split_content_by_tokens(content: str, chunk_size: int = 100000) -> List[str]
         return ['']
 
     try:
-        # First do a rough pre-chunking by characters to avoid stack overflow
+        # Encode in rough character slices to avoid stack overflow on huge
+        # inputs, but carry leftover tokens across slices so every chunk
+        # except the last is a full chunk_size window
         MAX_CHUNK_CHARS = 100000  # Adjust this based on your needs
-        rough_chunks = []
 
-        for i in range(0, len(content), MAX_CHUNK_CHARS):
-            rough_chunks.append(content[i:i + MAX_CHUNK_CHARS])
-
-        encoder = tiktoken.get_encoding("cl100k_base")
+        if encoder is None:
+            encoder = _get_encoder()
+            if encoder is None:
+                return _split_by_lines(content, max_chunk_size=chunk_size)
         final_chunks = []
+        pending = []
 
-        # Process each rough chunk
-        for rough_chunk in rough_chunks:
-            tokens = encoder.encode(rough_chunk)
+        for i in range(0, len(content), MAX_CHUNK_CHARS):
+            # encode_ordinary skips the special-token scan: source files are
+            # plain text, and a literal "<|endoftext|>" would otherwise raise
+            # and push the whole export onto the line-based fallback
+            pending.extend(encoder.encode_ordinary(content[i:i + MAX_CHUNK_CHARS]))
 
-            # Split into smaller chunks based on token count
-            for i in range(0, len(tokens), chunk_size):
-                chunk_tokens = tokens[i:i + chunk_size]
-                chunk_content = encoder.decode(chunk_tokens)
-                final_chunks.append(chunk_content)
+            # Emit complete windows, keep the remainder for the next slice
+            full = len(pending) - len(pending) % chunk_size
+            for start in range(0, full, chunk_size):
+                final_chunks.append(encoder.decode(pending[start:start + chunk_size]))
+            del pending[:full]
+
+        if pending:
+            final_chunks.append(encoder.decode(pending))
 
         return final_chunks
 
@@ -212,35 +229,38 @@ def _split_by_lines(content: str, max_chunk_size: int = 100000) -> List[str]:
 
     return chunks
 
-def delete_and_create_output_dir(output_dir: Path) -> None:
-    """Delete the output directory if it exists and recreate it."""
-    if output_dir.exists() and output_dir.is_dir():
-        # Preserve the menu state file if it exists
-        menu_state_file = output_dir / 'menu_state.json'
-        menu_state_data = None
-        if menu_state_file.exists():
-            try:
-                with open(menu_state_file, 'r') as f:
-                    menu_state_data = f.read()
-            except Exception:
-                pass
-
-        # Delete the directory
-        shutil.rmtree(output_dir)
+# Files in the output directory that are kept between runs
+_PRESERVED_OUTPUT_FILES = frozenset({'menu_state.mpk', 'menu_state.json', ANALYSIS_CACHE_FILE})
 
-        # Recreate the directory
-        output_dir.mkdir(parents=True, exist_ok=True)
+def delete_and_create_output_dir(output_dir: Path) -> None:
+    """Clear the output directory if it exists, or create it.
 
-        # Restore the menu state file if we had one
-        if menu_state_data:
-            try:
-                with open(menu_state_file, 'w') as f:
-                    f.write(menu_state_data)
-            except Exception:
-                pass
+    The menu state file (msgpack or legacy JSON) and the analysis cache are
+    kept so they carry over to the next run.
+    """
+    if output_dir.exists() and output_dir.is_dir():
+        with os.scandir(output_dir) as it:
+            for entry in it:
+                if entry.name in _PRESERVED_OUTPUT_FILES:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
     else:
         output_dir.mkdir(parents=True, exist_ok=True)
 
+def _list_output_files(output_dir: Path, prefix: str, suffix: str = '.txt') -> List[Path]:
+    """List files in the output directory named prefix*suffix, sorted by name."""
+    try:
+        with os.scandir(output_dir) as it:
+            names = [entry.name for entry in it
+                     if entry.name.startswith(prefix) and entry.name.endswith(suffix)
+                     and entry.is_file()]
+    except OSError:
+        return []
+    return [output_dir / name for name in sorted(names)]
+
 def export_full_content(path: Path, output_dir: Path, ignore_patterns: List[str], exclude_paths: List[Path] = None, include_samples: bool = True, progress=None, task_id=None) -> None:
     """Export full content of all files with optional sample snippets."""
     file_content = []
@@ -397,36 +417,44 @@ FUNCTION: [{func['schema']}].[{func['name']}]
 
 def _combine_fs_results(combined: dict, result: dict) -> None:
     """Combine file system analysis results."""
+    summary = result.get('summary', {})
+    combined_summary = combined['summary']
+    combined_metrics = combined_summary['code_metrics']
+
     # Update project stats
-    stats = result.get('summary', {}).get('project_stats', {})
-    combined['summary']['project_stats']['total_files'] += stats.get('total_files', 0)
-    combined['summary']['project_stats']['lines_of_code'] += stats.get('lines_of_code', 0)
+    stats = summary.get('project_stats', {})
+    combined_stats = combined_summary['project_stats']
+    combined_stats['total_files'] += stats.get('total_files', 0)
+    combined_stats['lines_of_code'] += stats.get('lines_of_code', 0)
 
     # Update code metrics
-    metrics = result.get('summary', {}).get('code_metrics', {})
+    metrics = summary.get('code_metrics', {})
     for metric_type in ['functions', 'classes']:
         if metric_type in metrics:
+            source = metrics[metric_type]
+            target = combined_metrics[metric_type]
             for key in ['count', 'with_docs', 'complex']:
-                if key in metrics[metric_type]:
-                    combined['summary']['code_metrics'][metric_type][key] += metrics[metric_type][key]
+                if key in source:
+                    target[key] += source[key]
 
     # Update imports
     if 'imports' in metrics:
-        combined['summary']['code_metrics']['imports']['count'] += metrics['imports'].get('count', 0)
+        combined_imports = combined_metrics['imports']
+        combined_imports['count'] += metrics['imports'].get('count', 0)
         unique_imports = metrics['imports'].get('unique', set())
         if isinstance(unique_imports, (set, list)):
-            combined['summary']['code_metrics']['imports']['unique'].update(unique_imports)
+            combined_imports['unique'].update(unique_imports)
 
     # Update maintenance info
-    maintenance = result.get('summary', {}).get('maintenance', {})
-    combined['summary']['maintenance']['todos'].extend(maintenance.get('todos', []))
+    maintenance = summary.get('maintenance', {})
+    combined_summary['maintenance']['todos'].extend(maintenance.get('todos', []))
 
     # Update structure info
-    structure = result.get('summary', {}).get('structure', {})
+    structure = summary.get('structure', {})
     if 'directories' in structure:
         dirs = structure['directories']
         if isinstance(dirs, (set, list)):
-            combined['summary']['structure']['directories'].update(dirs)
+            combined_summary['structure']['directories'].update(dirs)
 
     # Update insights and files
     if 'insights' in result:
@@ -559,27 +587,22 @@ def _combine_results(results: List[Union[dict, AnalysisResult]]) -> AnalysisResu
 
 def _combine_sql_results(combined: dict, sql_result: dict) -> None:
     """Combine SQL results with proper object counting."""
-    # Count objects
-    proc_count = len(sql_result.get('stored_procedures', []))
-    view_count = len(sql_result.get('views', []))
-    func_count = len(sql_result.get('functions', []))
+    procedures = sql_result.get('stored_procedures', [])
+    views = sql_result.get('views', [])
+    functions = sql_result.get('functions', [])
 
     # Update stats
-    combined['summary']['project_stats']['total_sql_objects'] += proc_count + view_count + func_count
-    combined['summary']['code_metrics']['sql_objects']['procedures'] += proc_count
-    combined['summary']['code_metrics']['sql_objects']['views'] += view_count
-    combined['summary']['code_metrics']['sql_objects']['functions'] += func_count
+    sql_objects = combined['summary']['code_metrics']['sql_objects']
+    combined['summary']['project_stats']['total_sql_objects'] += len(procedures) + len(views) + len(functions)
+    sql_objects['procedures'] += len(procedures)
+    sql_objects['views'] += len(views)
+    sql_objects['functions'] += len(functions)
 
     # Add objects to files
-    for proc in sql_result.get('stored_procedures', []):
-        key = f"stored_proc_{proc['name']}"
-        combined['files'][key] = proc
-    for view in sql_result.get('views', []):
-        key = f"view_{view['name']}"
-        combined['files'][key] = view
-    for func in sql_result.get('functions', []):
-        key = f"function_{func['name']}"
-        combined['files'][key] = func
+    files = combined['files']
+    files.update((f"stored_proc_{proc['name']}", proc) for proc in procedures)
+    files.update((f"view_{view['name']}", view) for view in views)
+    files.update((f"function_{func['name']}", func) for func in functions)
 
 def open_in_llm_provider(provider: str, output_path: Path, debug: bool = False, custom_url: str = None) -> bool:
     """
@@ -656,16 +679,16 @@ In my next message, I'll tell you about a new request or question about this cod
             full_message += f"# Code Analysis\n\n```\n{analysis_file.read_text(encoding='utf-8')}\n```\n\n"
 
         # Check if full export is enabled by looking for full_*.txt files
-        full_files = list(output_path.glob('full_*.txt'))
+        full_files = _list_output_files(output_path, 'full_')
 
         # If full export is enabled, add the content of all full files
         if full_files:
-            for file in sorted(full_files):
+            for file in full_files:
                 full_message += f"# {file.name}\n\n```\n{file.read_text(encoding='utf-8')}\n```\n\n"
 
             # Add SQL content files if they exist
-            sql_files = list(output_path.glob('sql_full_*.txt'))
-            for file in sorted(sql_files):
+            sql_files = _list_output_files(output_path, 'sql_full_')
+            for file in sql_files:
                 full_message += f"# {file.name}\n\n```sql\n{file.read_text(encoding='utf-8')}\n```\n\n"
 
         # Copy the full message to clipboard (for all providers as backup)
@@ -799,9 +822,13 @@ In my next message, I'll tell you about a new request or question about this cod
 @click.option('--open-in-llm', help='Open results in LLM provider (claude, chatgpt, gemini, none)', default=None)
 @click.option('--respect-gitignore/--ignore-gitignore', default=True, help='Respect .gitignore file patterns (default: enabled)')  # NEW OPTION
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose debug output')
+@click.option('--jobs', '-j', type=click.IntRange(min=0), default=1, show_default=True,
+              help='Worker processes for file analysis (0 = one per CPU)')
+@click.option('--cache/--no-cache', default=True, help='Reuse the analysis of unchanged files from the previous run (default: enabled)')
 def main(path: str, output: str, format: str, full: bool, debug: bool,
          sql_server: str, sql_database: str, sql_config: str, exclude: tuple,
-         interactive: bool = True, open_in_llm: str = None, respect_gitignore: bool = True, verbose: bool = False):  # NEW PARAMETER
+         interactive: bool = True, open_in_llm: str = None, respect_gitignore: bool = True, verbose: bool = False,  # NEW PARAMETER
+         jobs: int = 1, cache: bool = True):
     """
     Main entry point for the CLI with gitignore support.
     """
@@ -917,13 +944,13 @@ def main(path: str, output: str, format: str, full: bool, debug: bool,
             console.print("[bold blue]📊 Starting SQL Analysis...[/]")
             try:
                 from .analyzer import SQLServerAnalyzer
-                analyzer = SQLServerAnalyzer()
+                sql_analyzer = SQLServerAnalyzer()
 
                 try:
-                    analyzer.connect(sql_server)  # Will use env vars if not provided
+                    sql_analyzer.connect(sql_server)  # Will use env vars if not provided
                     if sql_database:
                         console.print(f"[blue]Analyzing database: {sql_database}[/]")
-                        sql_result = analyzer.analyze_database(sql_database)
+                        sql_result = sql_analyzer.analyze_database(sql_database)
                         results.append(sql_result)
 
                         if full:
@@ -931,10 +958,10 @@ def main(path: str, output: str, format: str, full: bool, debug: bool,
                             export_sql_content(sql_result, output_path)
                     else:
                         # Get all databases the user has access to
-                        databases = analyzer.list_databases()
+                        databases = sql_analyzer.list_databases()
                         for db in databases:
                             console.print(f"[blue]Analyzing database: {db}[/]")
-                            sql_result = analyzer.analyze_database(db)
+                            sql_result = sql_analyzer.analyze_database(db)
                             results.append(sql_result)
 
                             if full:
@@ -972,6 +999,10 @@ def main(path: str, output: str, format: str, full: bool, debug: bool,
         analyzer = ProjectAnalyzer()
         # Pass verbose flag to analyzer
         analyzer.verbose = verbose
+        analyzer.jobs = jobs or os.cpu_count() or 1
+        analyzer.cache = (AnalysisCache(output_path / ANALYSIS_CACHE_FILE,
+                                        fingerprint=analyzer.cache_fingerprint())
+                          if cache else None)
 
         # Pass include/exclude paths to analyzer if they were set in interactive mode
         if interactive and (include_paths or exclude_paths):
@@ -1076,7 +1107,11 @@ def main(path: str, output: str, format: str, full: bool, debug: bool,
             # Create main analysis task
             analysis_task = progress.add_task("Analyzing project files...", total=None)
             
-            fs_results = analyzer.analyze(path)
+            try:
+                fs_results = analyzer.analyze(path)
+            finally:
+                if analyzer.cache is not None:
+                    analyzer.cache.close()
             progress.update(analysis_task, completed=100, total=100)
 
         results.append(fs_results)
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from typing import Dict, List
 from ..analyzer.base import AnalysisResult
 
@@ -399,12 +400,9 @@ def _format_sql_file(analysis: dict, is_large_codebase: bool = False) -> List[st
     if sql_objects:
         if is_large_codebase:
             # Group by type and show counts
-            by_type = {}
+            by_type = defaultdict(list)
             for obj in sql_objects:
-                obj_type = obj['type'].upper()
-                if obj_type not in by_type:
-                    by_type[obj_type] = []
-                by_type[obj_type].append(obj['name'])
+                by_type[obj['type'].upper()].append(obj['name'])
             
             for obj_type, names in by_type.items():
                 sections.append(f"\n    {obj_type}S: {len(names)}")
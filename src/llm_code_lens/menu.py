@@ -4,39 +4,93 @@ Provides a TUI for selecting files and directories to include/exclude in analysi
 """
 
 import curses
+import fnmatch
+import logging
 import os
+import re
+import sys
+import threading
 import webbrowser
 from pathlib import Path
-from typing import Dict, List, Any, Tuple, Set, Optional
+from typing import Dict, Iterator, List, Any, Tuple, Set, Optional
 from llm_code_lens.utils.gitignore import GitignoreParser
 
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Menu state is stored as msgpack when available; JSON is the fallback and legacy format
+STATE_FILE_MSGPACK = 'menu_state.mpk'
+STATE_FILE_JSON = 'menu_state.json'
+
+# LLM providers in the order F7 cycles through them (legacy 'local' is migrated to 'custom')
+LLM_PROVIDERS = ('claude', 'chatgpt', 'gemini', 'custom', 'none')
+_PROVIDER_INDEX = {provider: i for i, provider in enumerate(LLM_PROVIDERS)}
+
+# File row state code: bit 0 = selected, bit 1 = auto-excluded (common dirs)
+ROW_INDICATORS = ("[ ]", "[*]", "[X]", "[*]")
+
+# Section indicator labels
+_FILES_SECTION = " [F]iles "
+_OPTIONS_SECTION = " [O]ptions "
+_TAB_HINT = " [Tab] to switch sections "
+_ESC_HINT = " [Esc] to cancel "
+
+# Update dialog frame, built once
+DIALOG_WIDTH = 60
+DIALOG_HEIGHT = 8
+_DIALOG_BORDER = "+" + "-" * (DIALOG_WIDTH - 2) + "+"
+_DIALOG_SIDE = "|" + " " * (DIALOG_WIDTH - 2) + "|"
+
 class MenuState:
     """Class to manage the state of the interactive menu."""
 
-    def __init__(self, root_path: Path, initial_settings: Dict[str, Any] = None):
+    def __init__(self, root_path: Path, initial_settings: Dict[str, Any] = None,
+                 defer_auto_select: bool = False):
         self.root_path = root_path.resolve()
+        self._root_str = sys.intern(str(self.root_path))  # Cached; the root is compared and walked often
 
         # DEBUG: Force clean state by removing any cached state with 'local'
         try:
-            state_file = self.root_path / '.codelens' / 'menu_state.json'
+            state_file = self.root_path / '.codelens' / STATE_FILE_JSON
             if state_file.exists():
                 import json
                 with open(state_file, 'r') as f:
                     state = json.load(f)
                 if state.get('options', {}).get('llm_provider') == 'local':
-                    print("DEBUG: Removing cached state with 'local' provider")
+                    logger.debug("Removing cached state with 'local' provider")
                     state_file.unlink()
         except Exception:
             pass
         self.current_path = self.root_path
         self.expanded_dirs: Set[str] = set()
         self.selected_items: Set[str] = set()  # Simple binary selection: selected or not
+        self._excluded_cache: Dict[str, bool] = {}  # path_str -> is_excluded result
         self.cursor_pos = 0
         self.scroll_offset = 0
         self.visible_items: List[Tuple[Path, int]] = []  # (path, depth)
+        self.dirty_structure = True  # visible_items must be rebuilt (expansion/ignore rules changed)
+        self._expanded_rows: Set[int] = set()  # Indices of expanded dirs in visible_items
+        # Per-row data parallel to visible_items, filled while building the list
+        self._row_paths: List[str] = []
+        self._row_is_dir: List[bool] = []
+        self._row_excluded: List[bool] = []
+        self._excluded_row_count = 0  # sum(_row_excluded), kept current as rows change
+        self._path_to_visible_idx: Optional[Dict[str, int]] = None  # Built on first lookup after a change
+        self._saved_fingerprint: Optional[Tuple[Any, ...]] = None  # State as last loaded or saved
         self.max_visible = 0
         self.status_message = ""
         self.cancelled = False  # Flag to indicate if user cancelled
+        self.scanning_in_progress = False  # Background auto-selection running
+        self._auto_select_pending = False
+        self._auto_select_thread: Optional[threading.Thread] = None
+        self._auto_select_cancel = threading.Event()  # Set to stop a running scan early
+        # (selected paths, error message) from the worker, merged on the UI thread
+        self._auto_select_result: Optional[Tuple[Set[str], Optional[str]]] = None
+        self._toggled_during_scan: Set[str] = set()
 
         # Add version update related attributes
         self.new_version_available = False
@@ -115,6 +169,16 @@ class MenuState:
             '.codelens'
         ]
 
+        # Literal names are matched with a set lookup, wildcard entries with one regex
+        self._common_literals = frozenset(
+            name for name in self.common_excludes if not any(c in name for c in '*?[')
+        )
+        common_globs = [name for name in self.common_excludes if name not in self._common_literals]
+        self._common_glob_re = (
+            re.compile('|'.join(fnmatch.translate(name) for name in common_globs))
+            if common_globs else None
+        )
+
         # CLI options (updated)
         self.options = {
             'format': 'txt',           # Output format (txt or json)
@@ -157,7 +221,7 @@ class MenuState:
                         'max_tokens': 4000
                     }
                 },
-                'available_providers': ['claude', 'chatgpt', 'gemini', 'custom', 'none'],
+                'available_providers': list(LLM_PROVIDERS),
                 'prompt_templates': {
                     'code_analysis': 'Analyze this code and provide feedback on structure, potential bugs, and improvements:\n\n{code}',
                     'security_review': 'Review this code for security vulnerabilities and suggest fixes:\n\n{code}',
@@ -187,11 +251,24 @@ class MenuState:
         self.active_section = 'files'  # Current active section: 'files' or 'options'
         self.option_cursor = 0         # Cursor position in options section
         self.editing_option = None     # Currently editing option (for text input)
-        self.edit_buffer = ""          # Buffer for text input
+        self._edit_chars: List[str] = []  # Buffer for text input (see edit_buffer)
+        self._status_render: Tuple[Any, str] = (None, "")    # (inputs, text) of the last status line
+        self._controls_render: Tuple[Any, str] = (None, "")  # (inputs, text) of the last footer
+        self._chrome_cache: Dict[Tuple[int, str], Tuple[str, str]] = {}  # (width, section) -> centered headers
+        self.colors_initialized = False  # Color pairs are set up on first draw
+        self.color_attrs: Dict[str, int] = {}  # Color pair attributes, filled in with the pairs
+        self.row_attrs: Tuple[Tuple[int, ...], ...] = ()  # [is_dir][row state code] -> attribute
+        self._options_layout_cache: Optional[List[Tuple[str, str, str]]] = None
+        self._options_layout_dirty = True  # Rebuild the options rows on next draw
+        self._options_version = 0  # Bumped whenever an option changes
+        self._options_lines: List[str] = []  # Formatted option rows for _options_lines_key
+        self._options_lines_key: Optional[Tuple[int, int]] = None  # (options version, screen width)
+        self._total_options = 0
+        self._options_changed()
 
         # Simple initialization - just build the initial visible items
         # Make sure root is expanded by default so we can see files
-        self.expanded_dirs.add(str(self.root_path))
+        self.expanded_dirs.add(self._root_str)
         self.rebuild_visible_items()
 
         # Load saved state first, then auto-select if no saved state exists
@@ -199,31 +276,140 @@ class MenuState:
 
         # Debug: Check if we have legacy 'local' provider
         if self.options['llm_provider'] == 'local':
-            print(f"DEBUG: Found legacy 'local' provider, converting to 'custom'")
+            logger.debug("Found legacy 'local' provider, converting to 'custom'")
             self.options['llm_provider'] = 'custom'
 
         # Ensure provider is valid
-        valid_providers = ['claude', 'chatgpt', 'gemini', 'custom', 'none']
-        if self.options['llm_provider'] not in valid_providers:
-            print(f"DEBUG: Invalid provider '{self.options['llm_provider']}', resetting to 'claude'")
+        if self.options['llm_provider'] not in _PROVIDER_INDEX:
+            logger.debug("Invalid provider %r, resetting to 'claude'", self.options['llm_provider'])
             self.options['llm_provider'] = 'claude'
 
+        self._options_changed()
+
         if not state_loaded:
             # No saved state - auto-select all non-ignored files and folders
-            self._auto_select_files()
+            # (run_menu defers this to a background thread)
+            self._auto_select_pending = True
+            if not defer_auto_select:
+                self._auto_select_files()
+                self._auto_select_pending = False
+
+    def start_auto_select(self) -> None:
+        """Run a deferred auto-selection on a background thread."""
+        if not self._auto_select_pending:
+            return
+        self._auto_select_pending = False
+        self.scanning_in_progress = True
+        self._auto_select_result = None
+        self.status_message = "Auto-selecting relevant files..."
+        # The worker gets the parser as an argument: toggling gitignore on the
+        # UI thread rebinds self.gitignore_parser while the scan is running
+        self._auto_select_thread = threading.Thread(
+            target=self._auto_select_worker,
+            args=(self.gitignore_parser, self._auto_select_cancel), daemon=True)
+        self._auto_select_thread.start()
+
+    def _auto_select_worker(self, gitignore_parser: Optional[GitignoreParser],
+                            cancel: threading.Event) -> None:
+        """Background entry point: scan, then hand the result over for merge_auto_select."""
+        result: Tuple[Set[str], Optional[str]] = (set(), "Error during auto-selection")
+        try:
+            result = self._scan_auto_selection(gitignore_parser, cancel)
+        finally:
+            self._auto_select_result = result
+
+    def merge_auto_select(self) -> bool:
+        """Apply a finished background auto-selection on the calling (UI) thread.
+
+        Returns True if a result was merged. scanning_in_progress is only cleared
+        here, so toggles keep being recorded until the merge has happened.
+        """
+        result = self._auto_select_result
+        if result is None:
+            return False
+        self._auto_select_result = None
+        self._merge_auto_selection(result)
+        self.scanning_in_progress = False
+        return True
+
+    def cancel_auto_select(self) -> None:
+        """Stop a background auto-selection without waiting for it or merging its result.
+
+        The worker is a daemon thread and stops at its next directory; whatever
+        it hands over afterwards is never merged.
+        """
+        self._auto_select_cancel.set()
+        self._auto_select_thread = None
+        self._auto_select_result = None
+        self.scanning_in_progress = False
+
+    def wait_for_auto_select(self) -> None:
+        """Block until a background auto-selection has finished, then merge it."""
+        if self._auto_select_thread is not None:
+            self._auto_select_thread.join()
+            self._auto_select_thread = None
+        self.merge_auto_select()
 
     def toggle_dir_expanded(self, path: Path) -> None:
         """Toggle directory expansion state."""
-        path_str = str(path)
+        path_str = sys.intern(str(path))
         if path_str in self.expanded_dirs:
             self.expanded_dirs.remove(path_str)
         else:
             self.expanded_dirs.add(path_str)
-        self.rebuild_visible_items()
+        self._refresh_dir_rows(path_str)
+
+    def _refresh_dir_rows(self, path_str: str) -> None:
+        """Re-list only the rows below one directory after it was expanded or collapsed."""
+        idx = self.find_visible_index(path_str)
+        if idx is None or self.dirty_structure:
+            # Not on screen (or the whole list is stale) - fall back to a full rebuild
+            self.rebuild_visible_items()
+            return
+
+        path, depth = self.visible_items[idx]
+
+        # Current rows of the directory: itself plus its deeper-indented descendants
+        end = idx + 1
+        while end < len(self.visible_items) and self.visible_items[end][1] > depth:
+            end += 1
+
+        rows = list(self._iter_rows(path, path_str, depth, self._row_is_dir[idx]))
+        path_index = self._visible_index_map()
+        for old_path in self._row_paths[idx + 1:end]:
+            del path_index[old_path]
+        self.visible_items[idx:end] = [(row[0], row[2]) for row in rows]
+        self._row_paths[idx:end] = [row[1] for row in rows]
+        self._row_is_dir[idx:end] = [row[3] for row in rows]
+        new_excluded = [row[5] for row in rows]
+        self._excluded_row_count += sum(new_excluded) - sum(self._row_excluded[idx:end])
+        self._row_excluded[idx:end] = new_excluded
+
+        # Keep the path -> row map current: rows above the directory keep their
+        # index, and rows below it only move when the row count changed
+        row_paths = self._row_paths
+        reindex_end = idx + len(rows) if len(rows) == end - idx else len(row_paths)
+        for i in range(idx + 1, reindex_end):
+            path_index[row_paths[i]] = i
+
+        # Shift expanded row indices below the splice and add the new ones
+        shift = len(rows) - (end - idx)
+        expanded_rows = {i if i < idx else i + shift for i in self._expanded_rows
+                         if not idx <= i < end}
+        expanded_rows.update(idx + offset for offset, row in enumerate(rows) if row[4])
+        self._expanded_rows = expanded_rows
+
+        # Adjust cursor position if it's now out of bounds
+        if self.cursor_pos >= len(self.visible_items) and len(self.visible_items) > 0:
+            self.cursor_pos = len(self.visible_items) - 1
 
     def toggle_selection(self, path: Path) -> None:
         """Simple Norton Commander style selection toggle."""
-        path_str = str(path)
+        path_str = sys.intern(str(path))
+
+        # Don't let a still-running auto-selection override the user's choice
+        if self.scanning_in_progress:
+            self._toggled_during_scan.add(path_str)
 
         if path_str in self.selected_items:
             self.selected_items.remove(path_str)
@@ -236,28 +422,72 @@ class MenuState:
         """Check if a path is selected."""
         return str(path) in self.selected_items
 
-    def is_excluded(self, path: Path) -> bool:
-        """Check if a path should be excluded by default (common directories)."""
+    def is_excluded(self, path: Path, is_dir: Optional[bool] = None) -> bool:
+        """Check if a path should be excluded by default (common directories).
+
+        Callers that already know whether the path is a directory (e.g. from a
+        DirEntry) can pass is_dir to avoid an extra stat call.
+        """
+        # Exclusion only depends on gitignore/common excludes, so memoize per path
+        path_str = str(path)
+        excluded = self._excluded_cache.get(path_str)
+        if excluded is None:
+            excluded = self._check_excluded(path, is_dir)
+            # Keep the cache roughly proportional to what is on screen
+            if len(self._excluded_cache) >= max(4096, 4 * len(self.visible_items)):
+                self._excluded_cache.clear()
+            self._excluded_cache[path_str] = excluded
+        return excluded
+
+    def _check_excluded(self, path: Path, is_dir: Optional[bool] = None) -> bool:
+        """Uncached exclusion check used by is_excluded."""
+        return self._excluded_with(self.gitignore_parser, path, is_dir)
+
+    def _excluded_with(self, gitignore_parser: Optional[GitignoreParser], path: Path,
+                       is_dir: Optional[bool] = None) -> bool:
+        """Exclusion check against the given gitignore parser (None skips gitignore)."""
         # Check gitignore first if enabled
-        if self.gitignore_parser and self.gitignore_parser.should_ignore(path):
+        if gitignore_parser is not None and gitignore_parser.should_ignore(path):
             return True
 
+        # Split name and parent name with string ops instead of building a parent Path
+        parent_str, _, name = os.fspath(path).rpartition(os.sep)
+
         # Check if it's a common exclude directory
-        if path.is_dir() and path.name in self.common_excludes:
-            return True
+        if self._is_common_exclude(name):
+            if is_dir is None:
+                is_dir = path.is_dir()
+            if is_dir:
+                return True
 
         # Check if parent is a common exclude directory
-        if path.parent.name in self.common_excludes:
+        if self._is_common_exclude(parent_str.rpartition(os.sep)[2]):
             return True
 
         return False
 
+    def _is_common_exclude(self, name: str) -> bool:
+        """Check a single path component against the common exclude names and globs."""
+        if name in self._common_literals:
+            return True
+        return self._common_glob_re is not None and self._common_glob_re.match(name) is not None
+
     def get_current_item(self) -> Optional[Path]:
         """Get the currently selected item."""
         if 0 <= self.cursor_pos < len(self.visible_items):
             return self.visible_items[self.cursor_pos][0]
         return None
 
+    def current_item_is_dir(self) -> bool:
+        """Check if the item under the cursor is a directory, using the cached row flag."""
+        if len(self._row_is_dir) == len(self.visible_items):
+            if 0 <= self.cursor_pos < len(self._row_is_dir):
+                return self._row_is_dir[self.cursor_pos]
+            return False
+        # visible_items was replaced without a rebuild - fall back to a stat
+        current_item = self.get_current_item()
+        return current_item is not None and current_item.is_dir()
+
     def move_cursor(self, direction: int) -> None:
         """Move the cursor up or down."""
         new_pos = self.cursor_pos + direction
@@ -270,34 +500,99 @@ class MenuState:
             elif self.cursor_pos >= self.scroll_offset + self.max_visible:
                 self.scroll_offset = self.cursor_pos - self.max_visible + 1
 
+    def find_visible_index(self, path_str: str) -> Optional[int]:
+        """Get the row index of a path in visible_items, or None if it is not shown."""
+        return self._visible_index_map().get(path_str)
+
+    def _visible_index_map(self) -> Dict[str, int]:
+        """Return the path -> row index map, building it on first use after a change."""
+        if self._path_to_visible_idx is None:
+            self._path_to_visible_idx = {p: i for i, p in enumerate(self._row_paths)}
+        return self._path_to_visible_idx
+
+    def iter_viewport(self) -> Iterator[Tuple[int, Path, int, str, bool, bool]]:
+        """Yield (idx, path, depth, path_str, is_dir, excluded) for the rows currently on screen."""
+        end = min(self.scroll_offset + self.max_visible, len(self.visible_items))
+        for idx in range(self.scroll_offset, end):
+            path, depth = self.visible_items[idx]
+            yield idx, path, depth, self._row_paths[idx], self._row_is_dir[idx], self._row_excluded[idx]
+
     def rebuild_visible_items(self) -> None:
         """Fast rebuild of visible items - Norton Commander style."""
+        self.dirty_structure = False
         self.visible_items = []
-        self._build_item_list(self.root_path, 0)
+        self._expanded_rows = set()
+        self._row_paths = []
+        self._row_is_dir = []
+        self._row_excluded = []
+        self._build_item_list(self.root_path, 0, self._root_str)
+        self._excluded_row_count = sum(self._row_excluded)
+        self._path_to_visible_idx = None
 
         # Adjust cursor position if it's now out of bounds
         if self.cursor_pos >= len(self.visible_items) and len(self.visible_items) > 0:
             self.cursor_pos = len(self.visible_items) - 1
 
-    def _build_item_list(self, path: Path, depth: int) -> None:
+    def _build_item_list(self, path: Path, depth: int, path_str: Optional[str] = None) -> None:
         """Fast build of visible items - Norton Commander style."""
-        # Add the current path to visible items (including root for navigation)
-        self.visible_items.append((path, depth))
-
-        # If it's a directory and it's expanded, add its children
-        if path.is_dir() and str(path) in self.expanded_dirs:
-            try:
-                # Sort directories first, then files
-                items = sorted(path.iterdir(),
-                              key=lambda p: (0 if p.is_dir() else 1, p.name.lower()))
-
-                for item in items:
-                    # Skip items that should be ignored
-                    if not self.is_excluded(item):
-                        self._build_item_list(item, depth + 1)
-            except (PermissionError, OSError):
-                # Silently handle permission errors in TUI mode
-                pass
+        if path_str is None:
+            path_str = str(path)
+        for row_path, path_str, row_depth, is_dir, expanded, excluded in self._iter_rows(
+                path, path_str, depth, path.is_dir()):
+            # Add the current path to visible items (including root for navigation)
+            if expanded:
+                self._expanded_rows.add(len(self.visible_items))
+            self.visible_items.append((row_path, row_depth))
+            self._row_paths.append(path_str)
+            self._row_is_dir.append(is_dir)
+            self._row_excluded.append(excluded)
+
+    def _iter_rows(self, path: Path, path_str: str, depth: int,
+                   is_dir: bool) -> Iterator[Tuple[Path, str, int, bool, bool, bool]]:
+        """Yield (path, path_str, depth, is_dir, expanded, excluded) rows for a subtree in display order.
+
+        Excluded children are skipped during the walk, so only the starting row
+        can itself be excluded; every other row is yielded with excluded=False.
+        """
+        # Iterative depth-first walk; avoids recursion limits on deep trees.
+        # Entries carry the is_dir flag from os.scandir so children are never re-stat'ed.
+        # Row paths are interned so they share storage (and identity) with the
+        # strings held in selected_items and expanded_dirs
+        intern = sys.intern
+        yield_excluded = self.is_excluded(path, is_dir)
+        stack = [(path, path_str, depth, is_dir)]
+        while stack:
+            path, path_str, depth, is_dir = stack.pop()
+            expanded = is_dir and path_str in self.expanded_dirs
+            yield path, path_str, depth, is_dir, expanded, yield_excluded
+            yield_excluded = False
+
+            # If it's a directory and it's expanded, add its children
+            if expanded:
+                try:
+                    children = []
+                    with os.scandir(path) as it:
+                        for entry in it:
+                            try:
+                                entry_is_dir = entry.is_dir()
+                            except OSError:
+                                entry_is_dir = False
+                            # Sort key fields first so the tuples sort without a key function
+                            children.append((not entry_is_dir, entry.name.lower(), entry.path))
+
+                    # Sort directories first, then files (case-insensitive by name)
+                    children.sort()
+
+                    # Push in reverse so children pop in sorted order
+                    for is_file, _, entry_path in reversed(children):
+                        entry_is_dir = not is_file
+                        item = Path(entry_path)
+                        # Skip items that should be ignored
+                        if not self.is_excluded(item, entry_is_dir):
+                            stack.append((item, intern(entry_path), depth + 1, entry_is_dir))
+                except (PermissionError, OSError):
+                    # Silently handle permission errors in TUI mode
+                    pass
 
     def toggle_option(self, option_name: str) -> None:
         """Toggle a boolean option or cycle through value options."""
@@ -317,25 +612,24 @@ class MenuState:
                 self.gitignore_parser = None
                 self.status_message = "Gitignore support disabled"
 
-            # Mark for rescan since ignore patterns changed
-            self.dirty_scan = True
+            # Cached exclusion results depend on the gitignore parser
+            self._excluded_cache.clear()
+
+            # Mark for rebuild since ignore patterns changed
+            self.dirty_structure = True
 
         elif option_name == 'format':
             # Cycle through format options
             self.options[option_name] = 'json' if self.options[option_name] == 'txt' else 'txt'
         elif option_name == 'llm_provider':
-            # Ensure we have the correct provider list (no 'local')
-            correct_providers = ['claude', 'chatgpt', 'gemini', 'custom', 'none']
-
             # Handle legacy 'local' provider
             current_provider = self.options[option_name]
             if current_provider == 'local':
                 current_provider = 'custom'
                 self.options[option_name] = 'custom'
 
-            current_index = correct_providers.index(current_provider) if current_provider in correct_providers else 0
-            next_index = (current_index + 1) % len(correct_providers)
-            self.options[option_name] = correct_providers[next_index]
+            current_index = _PROVIDER_INDEX.get(str(current_provider), 0)
+            self.options[option_name] = LLM_PROVIDERS[(current_index + 1) % len(LLM_PROVIDERS)]
 
             # If switching to custom, prompt for URL if not set
             if self.options[option_name] == 'custom' and not self.options['custom_llm_url']:
@@ -349,14 +643,88 @@ class MenuState:
             # Toggle boolean options
             self.options[option_name] = not self.options[option_name]
 
+        self._options_changed()
         self.status_message = f"Option '{option_name}' set to: {self.options[option_name]}"
 
     def set_option(self, option_name: str, value: Any) -> None:
         """Set an option to a specific value."""
         if option_name in self.options:
             self.options[option_name] = value
+            self._options_changed()
             self.status_message = f"Option '{option_name}' set to: {value}"
 
+    def _options_changed(self) -> None:
+        """Invalidate the cached options layout after an option changes."""
+        self._options_layout_dirty = True
+        self._options_version += 1
+        self._total_options = 9 + len(self.options['exclude_patterns'])  # 9 fixed options + exclude patterns
+
+    def get_options_layout(self) -> List[Tuple[str, str, str]]:
+        """Get the (name, value, key) rows for the options section, rebuilt only when options change."""
+        if self._options_layout_dirty or self._options_layout_cache is None:
+            options = self.options
+            layout = [
+                ("Format", f"{options['format']}", "F1"),
+                ("Full Export", f"{options['full']}", "F2"),
+                ("Debug Mode", f"{options['debug']}", "F3"),
+                ("Verbose Mode", f"{options['verbose']}", "F4"),
+                ("SQL Server", f"{options['sql_server'] or 'Not set'}", "F5"),
+                ("SQL Database", f"{options['sql_database'] or 'Not set'}", "F6"),
+                ("LLM Provider", f"{options['llm_provider']}" + (" (needs URL)" if options['llm_provider'] == 'custom' and not options['custom_llm_url'] else ""), "F7"),
+                ("Custom LLM URL", f"{options['custom_llm_url'] or 'Not set'}", "F8"),
+                ("Respect .gitignore", f"{options['respect_gitignore']}", "F9")
+            ]
+
+            # Add exclude patterns
+            for i, pattern in enumerate(options['exclude_patterns']):
+                layout.append((f"Exclude Pattern {i+1}", pattern, "Del"))
+
+            self._options_layout_cache = layout
+            self._options_layout_dirty = False
+        return self._options_layout_cache
+
+    def get_options_lines(self, max_x: int) -> List[str]:
+        """Get the option rows formatted for a screen width, reformatted only when options or width change."""
+        key = (self._options_version, max_x)
+        if self._options_lines_key != key:
+            lines = []
+            for name, value, hotkey in self.get_options_layout():
+                option_str = f" {name}: {value}"
+                key_str = f"[{hotkey}]"
+
+                # Calculate padding to right-align the key
+                padding = max_x - len(option_str) - len(key_str) - 2
+                if padding < 1:
+                    padding = 1
+
+                display_str = f"{option_str}{' ' * padding}{key_str}"
+
+                # Truncate if too long
+                if len(display_str) > max_x - 2:
+                    display_str = display_str[:max_x - 5] + "..."
+                lines.append(display_str)
+            self._options_lines = lines
+            self._options_lines_key = key
+        return self._options_lines
+
+    @property
+    def edit_buffer(self) -> str:
+        """Text typed so far while editing an option."""
+        return ''.join(self._edit_chars)
+
+    @edit_buffer.setter
+    def edit_buffer(self, value: str) -> None:
+        self._edit_chars = list(value)
+
+    def edit_insert(self, char: str) -> None:
+        """Append a character to the edit buffer."""
+        self._edit_chars.append(char)
+
+    def edit_backspace(self) -> None:
+        """Remove the last character from the edit buffer."""
+        if self._edit_chars:
+            self._edit_chars.pop()
+
     def start_editing_option(self, option_name: str) -> None:
         """Start editing a text-based option."""
         if option_name in self.options:
@@ -366,23 +734,26 @@ class MenuState:
 
     def finish_editing(self, save: bool = True) -> None:
         """Finish editing the current option."""
+        edit_buffer = self.edit_buffer
         if self.editing_option and save:
             if self.editing_option == 'new_exclude':
                 # Special handling for new exclude pattern
-                if self.edit_buffer.strip():
-                    self.add_exclude_pattern(self.edit_buffer.strip())
+                if edit_buffer.strip():
+                    self.add_exclude_pattern(edit_buffer.strip())
             else:
                 # Normal option
-                self.options[self.editing_option] = self.edit_buffer
-                self.status_message = f"Option '{self.editing_option}' set to: {self.edit_buffer}"
+                self.options[self.editing_option] = edit_buffer
+                self.status_message = f"Option '{self.editing_option}' set to: {edit_buffer}"
 
                 # Special handling for custom_llm_url - sync with providers
                 if self.editing_option == 'custom_llm_url':
-                    self.options['llm_options']['providers']['custom']['url'] = self.edit_buffer
+                    self.options['llm_options']['providers']['custom']['url'] = edit_buffer
                     # Auto-switch to custom provider if URL is set
-                    if self.edit_buffer.strip():
+                    if edit_buffer.strip():
                         self.options['llm_provider'] = 'custom'
-                        self.status_message = f"Custom LLM URL set to: {self.edit_buffer} (Provider switched to custom)"
+                        self.status_message = f"Custom LLM URL set to: {edit_buffer} (Provider switched to custom)"
+
+                self._options_changed()
 
         self.editing_option = None
         self.edit_buffer = ""
@@ -391,12 +762,14 @@ class MenuState:
         """Add an exclude pattern."""
         if pattern and pattern not in self.options['exclude_patterns']:
             self.options['exclude_patterns'].append(pattern)
+            self._options_changed()
             self.status_message = f"Added exclude pattern: {pattern}"
 
     def remove_exclude_pattern(self, index: int) -> None:
         """Remove an exclude pattern by index."""
         if 0 <= index < len(self.options['exclude_patterns']):
             pattern = self.options['exclude_patterns'].pop(index)
+            self._options_changed()
             self.status_message = f"Removed exclude pattern: {pattern}"
 
     def toggle_section(self) -> None:
@@ -411,11 +784,8 @@ class MenuState:
 
     def move_option_cursor(self, direction: int) -> None:
         """Move the cursor in the options section."""
-        # Count total options (fixed options + exclude patterns)
-        total_options = 9 + len(self.options['exclude_patterns'])  # 9 fixed options + exclude patterns
-
         new_pos = self.option_cursor + direction
-        if 0 <= new_pos < total_options:
+        if 0 <= new_pos < self._total_options:
             self.option_cursor = new_pos
 
     def validate_selection(self) -> Dict[str, List[str]]:
@@ -426,21 +796,56 @@ class MenuState:
             'selected_files': []
         }
 
+        # Reuse the directory flags gathered for visible rows; only stat the rest
+        known_is_dir = dict(zip(self._row_paths, self._row_is_dir))
+        selected_dirs = stats['selected_dirs']
+        selected_files = stats['selected_files']
+
         for path_str in self.selected_items:
-            path = Path(path_str)
-            if path.is_dir():
-                stats['selected_dirs'].append(path_str)
+            is_dir = known_is_dir.get(path_str)
+            if is_dir is None:
+                is_dir = os.path.isdir(path_str)
+            if is_dir:
+                selected_dirs.append(path_str)
             else:
-                stats['selected_files'].append(path_str)
+                selected_files.append(path_str)
 
         return stats
 
+    def _collapse_selection(self) -> List[str]:
+        """Get the selected paths that are not below another selected directory.
+
+        Include paths are matched by prefix, so a selected directory already
+        covers everything selected beneath it.
+        """
+        selected = self.selected_items
+        root_len = len(self._root_str)
+        sep = os.sep
+        collapsed = []
+        for path_str in selected:
+            parent = path_str.rpartition(sep)[0]
+            while len(parent) >= root_len:
+                if parent in selected:
+                    break
+                parent = parent.rpartition(sep)[0]
+            else:
+                collapsed.append(path_str)
+        collapsed.sort()
+        return collapsed
+
     def get_results(self) -> Dict[str, Any]:
         """Get the final results - simple Norton Commander style."""
+        # Include auto-selected items even if the user confirmed during the scan;
+        # a cancelled menu discards the selection, so don't wait for the scan
+        if self.cancelled:
+            self.cancel_auto_select()
+        else:
+            self.wait_for_auto_select()
+
         # Simple approach: if items are selected, use only those
         # Otherwise, include everything except common excludes
         if self.selected_items:
-            include_paths = [Path(p) for p in self.selected_items]
+            include_paths = [Path(p) for p in self._collapse_selection()]
             exclude_paths = []
         else:
             include_paths = [self.root_path]
@@ -529,7 +934,36 @@ class MenuState:
 
     def _auto_select_files(self) -> None:
         """Auto-select relevant code files and important folders that are not ignored by gitignore or common excludes."""
-        selected_count = 0
+        self._merge_auto_selection(self._scan_auto_selection(self.gitignore_parser))
+
+    def _merge_auto_selection(self, result: Tuple[Set[str], Optional[str]]) -> None:
+        """Add a scan result to selected_items, keeping paths the user toggled meanwhile."""
+        selected, error = result
+        if error is not None:
+            self.status_message = error
+            return
+
+        selected_count = len(selected)
+        selected.difference_update(self._toggled_during_scan)
+        self.selected_items.update(selected)
+        self._toggled_during_scan.clear()
+
+        # Update status message
+        if selected_count > 0:
+            self.status_message = f"Auto-selected {selected_count} relevant files and folders (excluding ignored items)"
+        else:
+            self.status_message = "No relevant files found to auto-select"
+
+    def _scan_auto_selection(self, gitignore_parser: Optional[GitignoreParser],
+                             cancel: Optional[threading.Event] = None) -> Tuple[Set[str], Optional[str]]:
+        """Walk the tree and return (paths to auto-select, error message or None).
+
+        Only reads the arguments and settings fixed at construction, so it can
+        run on the background thread without touching UI state. The walk stops
+        before the next directory once cancel is set.
+        """
+        # Collected locally; the caller merges it into selected_items
+        selected: Set[str] = set()
 
         # Define relevant code file extensions
         code_extensions = {
@@ -553,50 +987,70 @@ class MenuState:
             'config', 'scripts', 'tests', 'test', 'spec', 'docs', 'documentation'
         }
 
+        # Name prefixes checked with a single str.startswith(tuple) call
+        dir_prefixes = ('src', 'lib', 'app', 'web')
+        file_prefixes = ('readme', 'license', 'changelog', 'contributing')
+
+        # Skip deep nesting (more than 5 levels deep to avoid selecting too much)
+        max_depth = 5
+
+        # Selected paths are interned to share storage with the visible rows
+        intern = sys.intern
+
         try:
-            # Walk through all files and directories
-            for root, dirs, files in os.walk(self.root_path):
-                root_path = Path(root)
-
-                # Skip deep nesting (more than 5 levels deep to avoid selecting too much)
-                relative_depth = len(root_path.relative_to(self.root_path).parts)
-                if relative_depth > 5:
-                    dirs.clear()  # Don't recurse deeper
+            # Single scandir walk; excluded subtrees are never descended into
+            stack = [(self._root_str, 0)]
+            while stack:
+                if cancel is not None and cancel.is_set():
+                    return set(), "Auto-selection cancelled"
+                root, relative_depth = stack.pop()
+
+                try:
+                    with os.scandir(root) as it:
+                        entries = list(it)
+                except OSError:
                     continue
 
-                # Process directories - be selective about which ones to include
-                for dir_name in dirs[:]:  # Use slice copy to allow modification during iteration
-                    dir_path = root_path / dir_name
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
 
-                    # Skip if this directory should be excluded
-                    if self.is_excluded(dir_path):
-                        dirs.remove(dir_name)  # Don't recurse into excluded directories
+                    # Prune common excluded directories (node_modules, .git, ...) by name
+                    # before paying for a Path and a gitignore match
+                    if is_dir and self._is_common_exclude(entry.name):
                         continue
 
-                    # Only auto-select directories that are important or at root level
-                    should_select_dir = (
-                        relative_depth == 0 or  # Root level directories
-                        dir_name.lower() in important_dirs or  # Important directory names
-                        any(dir_name.lower().startswith(prefix) for prefix in ['src', 'lib', 'app', 'web'])  # Common prefixes
-                    )
+                    # Skip if this entry should be excluded (and don't recurse into it).
+                    # Each path is visited once here, so bypass the render cache.
+                    if self._excluded_with(gitignore_parser, Path(entry.path), is_dir):
+                        continue
+
+                    name_lower = entry.name.lower()
 
-                    if should_select_dir:
-                        self.selected_items.add(str(dir_path))
-                        selected_count += 1
+                    if is_dir:
+                        # Only auto-select directories that are important or at root level
+                        should_select_dir = (
+                            relative_depth == 0 or  # Root level directories
+                            name_lower in important_dirs or  # Important directory names
+                            name_lower.startswith(dir_prefixes)  # Common prefixes
+                        )
 
-                # Process files - only select relevant code files
-                for file_name in files:
-                    file_path = root_path / file_name
+                        if should_select_dir:
+                            selected.add(intern(entry.path))
 
-                    # Skip if this file should be excluded
-                    if self.is_excluded(file_path):
+                        # Like os.walk, don't follow symlinked directories, and never
+                        # queue directories whose contents are past the depth limit
+                        if relative_depth < max_depth and not entry.is_symlink():
+                            stack.append((entry.path, relative_depth + 1))
                         continue
 
-                    # Check if it's a relevant code file
-                    file_ext = file_path.suffix.lower()
+                    # Process files - only select relevant code files
+                    file_ext = os.path.splitext(name_lower)[1]
                     is_relevant_file = (
                         file_ext in code_extensions or
-                        file_name.lower() in {
+                        name_lower in {
                             'readme', 'readme.md', 'readme.txt', 'license', 'license.txt',
                             'package.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml',
                             'requirements.txt', 'setup.py', 'pyproject.toml', 'pipfile', 'poetry.lock',
@@ -604,28 +1058,34 @@ class MenuState:
                             'makefile', 'cmake', 'build.gradle', 'pom.xml', 'cargo.toml',
                             '.gitignore', '.env.example', '.env.template'
                         } or
-                        any(file_name.lower().startswith(prefix) for prefix in ['readme', 'license', 'changelog', 'contributing'])
+                        name_lower.startswith(file_prefixes)
                     )
 
                     if is_relevant_file:
-                        self.selected_items.add(str(file_path))
-                        selected_count += 1
-
-            # Update status message
-            if selected_count > 0:
-                self.status_message = f"Auto-selected {selected_count} relevant files and folders (excluding ignored items)"
-            else:
-                self.status_message = "No relevant files found to auto-select"
+                        selected.add(intern(entry.path))
 
         except Exception as e:
-            self.status_message = f"Error during auto-selection: {str(e)}"
+            return set(), f"Error during auto-selection: {str(e)}"
+
+        return selected, None
+
+    def _state_fingerprint(self) -> Tuple[Any, ...]:
+        """Snapshot of everything _save_state writes, for detecting unchanged state."""
+        import json
+        return (frozenset(self.expanded_dirs), frozenset(self.selected_items),
+                json.dumps(self.options, sort_keys=True, default=str))
 
     def _save_state(self) -> None:
         """Save the current state to a file."""
         try:
+            fingerprint = self._state_fingerprint()
+            if fingerprint == self._saved_fingerprint:
+                # Nothing changed since the state was loaded or last saved
+                return
+
             state_dir = self.root_path / '.codelens'
             state_dir.mkdir(exist_ok=True)
-            state_file = state_dir / 'menu_state.json'
+            state_file = state_dir / (STATE_FILE_MSGPACK if msgpack else STATE_FILE_JSON)
 
             # Enhanced state - expanded dirs, selected items, and metadata
             state = {
@@ -636,9 +1096,27 @@ class MenuState:
                 'version': '1.0'  # State format version for future compatibility
             }
 
-            import json
-            with open(state_file, 'w', encoding='utf-8') as f:
-                json.dump(state, f, indent=2, ensure_ascii=False)
+            if msgpack:
+                data = msgpack.packb(state, use_bin_type=True)
+            else:
+                import json
+                data = json.dumps(state, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+            # Write to a temporary file and swap it in, so a crash mid-write
+            # never leaves a truncated state file behind
+            tmp_file = state_file.with_name(state_file.name + '.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, state_file)
+            self._saved_fingerprint = fingerprint
+
+            if msgpack:
+                # The legacy JSON state has been migrated
+                legacy_file = state_dir / STATE_FILE_JSON
+                if legacy_file.exists():
+                    legacy_file.unlink()
         except Exception as e:
             # Use status message instead of print in TUI mode
             self.status_message = f"Error saving menu state: {str(e)}"
@@ -646,15 +1124,23 @@ class MenuState:
     def _load_state(self) -> bool:
         """Load the saved state from a file. Returns True if state was loaded successfully."""
         try:
-            state_file = self.root_path / '.codelens' / 'menu_state.json'
-            if state_file.exists():
+            state_dir = self.root_path / '.codelens'
+            state = None
+            current_format = False
+            if msgpack and (state_dir / STATE_FILE_MSGPACK).exists():
+                state = msgpack.unpackb((state_dir / STATE_FILE_MSGPACK).read_bytes(), raw=False)
+                current_format = True
+            elif (state_dir / STATE_FILE_JSON).exists():
+                # Legacy (or msgpack-less) state; migrated to msgpack on next save
                 import json
-                with open(state_file, 'r') as f:
+                with open(state_dir / STATE_FILE_JSON, 'r') as f:
                     state = json.load(f)
+                current_format = not msgpack
 
+            if state is not None:
                 # Restore simple state
-                self.expanded_dirs = set(state.get('expanded_dirs', []))
-                self.selected_items = set(state.get('selected_items', []))
+                self.expanded_dirs = set(map(sys.intern, state.get('expanded_dirs', [])))
+                self.selected_items = set(map(sys.intern, state.get('selected_items', [])))
 
                 # Restore options if available
                 if 'options' in state:
@@ -665,6 +1151,11 @@ class MenuState:
                                 value = 'custom'
                             self.options[key] = value
 
+                # A save with nothing changed can then be skipped (a legacy
+                # file is always rewritten so it gets migrated)
+                if current_format:
+                    self._saved_fingerprint = self._state_fingerprint()
+
                 # Set status message to indicate loaded state
                 selected_count = len(self.selected_items)
                 if selected_count > 0:
@@ -704,15 +1195,11 @@ class MenuState:
         self.status_message = f"Opening in {provider} is not yet implemented"
         return False
 
-def draw_menu(stdscr, state: MenuState) -> None:
-    """Draw the menu interface."""
-    curses.curs_set(0)  # Hide cursor
-    stdscr.clear()
+def _init_colors(state: MenuState) -> None:
+    """Set up the color pairs once per menu session."""
+    if state.colors_initialized:
+        return
 
-    # Get terminal dimensions
-    max_y, max_x = stdscr.getmaxyx()
-
-    # Set up colors
     curses.start_color()
     curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLUE)   # Header/footer
     curses.init_pair(2, curses.COLOR_BLACK, curses.COLOR_WHITE)  # Selected item
@@ -722,6 +1209,38 @@ def draw_menu(stdscr, state: MenuState) -> None:
     curses.init_pair(6, curses.COLOR_CYAN, curses.COLOR_BLACK)   # Options
     curses.init_pair(7, curses.COLOR_WHITE, curses.COLOR_RED)    # Active section
 
+    # Resolve the attributes once instead of calling color_pair() per draw call
+    state.color_attrs = {
+        'header': curses.color_pair(1),
+        'header_bold': curses.color_pair(1) | curses.A_BOLD,
+        'highlight': curses.color_pair(2),
+        'included': curses.color_pair(3),
+        'included_bold': curses.color_pair(3) | curses.A_BOLD,
+        'excluded': curses.color_pair(4),
+        'directory': curses.color_pair(5),
+        'option': curses.color_pair(6),
+        'active': curses.color_pair(7),
+    }
+    colors = state.color_attrs
+    # Directories keep the directory color unless auto-excluded (and not selected)
+    state.row_attrs = (
+        (0, colors['included_bold'], colors['excluded'], colors['included_bold']),
+        (colors['directory'], colors['directory'], colors['excluded'], colors['included_bold']),
+    )
+    state.colors_initialized = True
+
+def draw_menu(stdscr, state: MenuState) -> None:
+    """Draw the menu interface."""
+    curses.curs_set(0)  # Hide cursor (editing mode may have shown it)
+    stdscr.clear()
+
+    # Get terminal dimensions
+    max_y, max_x = stdscr.getmaxyx()
+
+    # Set up colors (no-op after the first frame)
+    _init_colors(state)
+    colors = state.color_attrs
+
     # Calculate layout
     options_height = 10  # Height of options section
     files_height = max_y - options_height - 4  # Height of files section (minus header/footer)
@@ -732,100 +1251,86 @@ def draw_menu(stdscr, state: MenuState) -> None:
     else:
         state.max_visible = files_height - 2  # Reduce slightly when in options mode
 
+    # Centered header strings only depend on the width and active section
+    chrome_key = (max_x, state.active_section)
+    chrome = state._chrome_cache.get(chrome_key)
+    if chrome is None:
+        if len(state._chrome_cache) > 8:
+            state._chrome_cache.clear()
+        header = f" LLM Code Lens - {'File Selection' if state.active_section == 'files' else 'Options'} "
+        chrome = (
+            header.center(max_x-1, "=")[:max_x-1],
+            " Analysis Options ".center(max_x-1, "-")[:max_x-1],
+        )
+        state._chrome_cache[chrome_key] = chrome
+    header, options_header = chrome
+
     # Draw header
-    header = f" LLM Code Lens - {'File Selection' if state.active_section == 'files' else 'Options'} "
-    header = header.center(max_x-1, "=")
     try:
-        stdscr.addstr(0, 0, header[:max_x-1], curses.color_pair(1))
+        stdscr.addstr(0, 0, header, colors['header'])
     except curses.error:
         pass
 
     # Draw section indicator with improved visibility
     section_y = 1
-    files_section = " [F]iles "
-    options_section = " [O]ptions "
-    tab_hint = " [Tab] to switch sections "
-    esc_hint = " [Esc] to cancel "
 
     try:
         # Files section indicator with better highlighting
-        attr = curses.color_pair(7) if state.active_section == 'files' else curses.color_pair(1)
-        stdscr.addstr(section_y, 2, files_section, attr)
+        attr = colors['active'] if state.active_section == 'files' else colors['header']
+        stdscr.addstr(section_y, 2, _FILES_SECTION, attr)
 
         # Options section indicator
-        attr = curses.color_pair(7) if state.active_section == 'options' else curses.color_pair(1)
-        stdscr.addstr(section_y, 2 + len(files_section) + 2, options_section, attr)
+        attr = colors['active'] if state.active_section == 'options' else colors['header']
+        stdscr.addstr(section_y, 2 + len(_FILES_SECTION) + 2, _OPTIONS_SECTION, attr)
 
         # Add Tab hint in the middle
-        middle_pos = max_x // 2 - len(tab_hint) // 2
-        stdscr.addstr(section_y, middle_pos, tab_hint, curses.color_pair(6))
+        middle_pos = max_x // 2 - len(_TAB_HINT) // 2
+        stdscr.addstr(section_y, middle_pos, _TAB_HINT, colors['option'])
 
         # Add Escape hint on the right
-        right_pos = max_x - len(esc_hint) - 2
-        stdscr.addstr(section_y, right_pos, esc_hint, curses.color_pair(6))
+        right_pos = max_x - len(_ESC_HINT) - 2
+        stdscr.addstr(section_y, right_pos, _ESC_HINT, colors['option'])
     except curses.error:
         pass
 
     # Draw items if in files section or if files section is visible
     if state.active_section == 'files' or True:  # Always show files
         start_y = 2  # Start after header and section indicators
-        visible_count = min(state.max_visible, len(state.visible_items) - state.scroll_offset)
 
-        for i in range(visible_count):
-            idx = i + state.scroll_offset
-            if idx >= len(state.visible_items):
-                break
-
-            path, depth = state.visible_items[idx]
-            is_dir = path.is_dir()
-            is_excluded = state.is_excluded(path)
+        # Truncation bounds and lookups are fixed for the whole frame
+        max_item_len = max_x - 2
+        truncate_len = max_x - 5
+        selected_items = state.selected_items
+        row_attrs = state.row_attrs
+        highlighted = state.cursor_pos if state.active_section == 'files' else -1
 
+        for i, (idx, path, depth, path_str, is_dir, is_excluded) in enumerate(state.iter_viewport()):
             # Prepare the display string - simplified folder states
             indent = "  " * depth
             if is_dir:
-                prefix = "- " if str(path) in state.expanded_dirs else "+ "
+                prefix = "- " if idx in state._expanded_rows else "+ "
             else:
                 prefix = "  "
 
             # Simple Norton Commander style display
-            path_str = str(path)
-            is_selected = path_str in state.selected_items
+            row_state = (path_str in selected_items) | (is_excluded << 1)
 
-            if is_selected:
-                sel_indicator = "[*]"  # Selected
-            elif is_excluded:
-                sel_indicator = "[X]"  # Auto-excluded (common dirs)
-            else:
-                sel_indicator = "[ ]"  # Available
-
-            item_str = f"{indent}{prefix}{sel_indicator} {path.name}"
+            item_str = f"{indent}{prefix}{ROW_INDICATORS[row_state]} {path.name}"
 
             # Truncate if too long
-            if len(item_str) > max_x - 2:
-                item_str = item_str[:max_x - 5] + "..."
+            if len(item_str) > max_item_len:
+                item_str = item_str[:truncate_len] + "..."
 
             # Simple color scheme
-            if state.active_section == 'files' and idx == state.cursor_pos:
-                attr = curses.color_pair(2)  # Highlighted
-            elif is_selected:
-                attr = curses.color_pair(3) | curses.A_BOLD  # Selected
-            elif is_excluded:
-                attr = curses.color_pair(4)  # Auto-excluded
-            elif is_dir:
-                attr = curses.color_pair(5)  # Directory
+            if idx == highlighted:
+                attr = colors['highlight']  # Highlighted
             else:
-                attr = 0  # Default file
+                attr = row_attrs[is_dir][row_state]
 
-            # If it's a directory, add directory color (but keep excluded color if excluded)
-            if is_dir and not (state.active_section == 'files' and idx == state.cursor_pos) and not is_excluded:
-                attr = curses.color_pair(5)
-
-            # Draw the item
+            # Draw the item (the screen was cleared at the start of the frame,
+            # and truncation above already keeps it within the screen width)
             try:
-                stdscr.addstr(i + start_y, 0, " " * (max_x-1))  # Clear line
-                # Make sure we don't exceed the screen width
-                safe_str = item_str[:max_x-1] if len(item_str) >= max_x else item_str
-                stdscr.addstr(i + start_y, 0, safe_str, attr)
+                stdscr.addstr(i + start_y, 0, item_str, attr)
             except curses.error:
                 # Handle potential curses errors
                 pass
@@ -834,54 +1339,20 @@ def draw_menu(stdscr, state: MenuState) -> None:
     options_start_y = files_height + 2
     try:
         # Draw options header
-        options_header = " Analysis Options "
-        options_header = options_header.center(max_x-1, "-")
-        stdscr.addstr(options_start_y, 0, options_header[:max_x-1], curses.color_pair(6))
+        stdscr.addstr(options_start_y, 0, options_header, colors['option'])
 
         # Draw options
         option_y = options_start_y + 1
-        options = [
-            ("Format", f"{state.options['format']}", "F1"),
-            ("Full Export", f"{state.options['full']}", "F2"),
-            ("Debug Mode", f"{state.options['debug']}", "F3"),
-            ("Verbose Mode", f"{state.options['verbose']}", "F4"),
-            ("SQL Server", f"{state.options['sql_server'] or 'Not set'}", "F5"),
-            ("SQL Database", f"{state.options['sql_database'] or 'Not set'}", "F6"),
-            ("LLM Provider", f"{state.options['llm_provider']}" + (" (needs URL)" if state.options['llm_provider'] == 'custom' and not state.options['custom_llm_url'] else ""), "F7"),
-            ("Custom LLM URL", f"{state.options['custom_llm_url'] or 'Not set'}", "F8"),
-            ("Respect .gitignore", f"{state.options['respect_gitignore']}", "F9")
-        ]
+        option_lines = state.get_options_lines(max_x)
+        highlighted = state.option_cursor if state.active_section == 'options' else -1
 
-        # Add exclude patterns
-        for i, pattern in enumerate(state.options['exclude_patterns']):
-            options.append((f"Exclude Pattern {i+1}", pattern, "Del"))
-
-        # Draw each option
-        for i, (name, value, key) in enumerate(options):
+        # Draw each option (the screen was cleared at the start of the frame)
+        for i, display_str in enumerate(option_lines):
             if option_y + i >= max_y - 2:  # Don't draw past footer
                 break
 
-            # Determine if this option is selected
-            is_selected = state.active_section == 'options' and i == state.option_cursor
-
-            # Format the option string
-            option_str = f" {name}: {value}"
-            key_str = f"[{key}]"
-
-            # Calculate padding to right-align the key
-            padding = max_x - len(option_str) - len(key_str) - 2
-            if padding < 1:
-                padding = 1
-
-            display_str = f"{option_str}{' ' * padding}{key_str}"
-
-            # Truncate if too long
-            if len(display_str) > max_x - 2:
-                display_str = display_str[:max_x - 5] + "..."
-
             # Draw with appropriate highlighting
-            attr = curses.color_pair(2) if is_selected else curses.color_pair(6)
-            stdscr.addstr(option_y + i, 0, " " * (max_x-1))  # Clear line
+            attr = colors['highlight'] if i == highlighted else colors['option']
             stdscr.addstr(option_y + i, 0, display_str, attr)
     except curses.error:
         pass
@@ -889,8 +1360,8 @@ def draw_menu(stdscr, state: MenuState) -> None:
     # Draw update dialog if needed
     if state.show_update_dialog:
         # Calculate dialog dimensions and position
-        dialog_width = 60
-        dialog_height = 8
+        dialog_width = DIALOG_WIDTH
+        dialog_height = DIALOG_HEIGHT
         dialog_x = max(0, (max_x - dialog_width) // 2)
         dialog_y = max(0, (max_y - dialog_height) // 2)
 
@@ -899,10 +1370,10 @@ def draw_menu(stdscr, state: MenuState) -> None:
             try:
                 if y == 0 or y == dialog_height - 1:
                     # Draw top and bottom borders
-                    stdscr.addstr(dialog_y + y, dialog_x, "+" + "-" * (dialog_width - 2) + "+")
+                    stdscr.addstr(dialog_y + y, dialog_x, _DIALOG_BORDER)
                 else:
                     # Draw side borders
-                    stdscr.addstr(dialog_y + y, dialog_x, "|" + " " * (dialog_width - 2) + "|")
+                    stdscr.addstr(dialog_y + y, dialog_x, _DIALOG_SIDE)
             except curses.error:
                 pass
 
@@ -910,7 +1381,7 @@ def draw_menu(stdscr, state: MenuState) -> None:
         title = " Update Available "
         title_x = dialog_x + (dialog_width - len(title)) // 2
         try:
-            stdscr.addstr(dialog_y, title_x, title, curses.color_pair(1) | curses.A_BOLD)
+            stdscr.addstr(dialog_y, title_x, title, colors['header_bold'])
         except curses.error:
             pass
 
@@ -939,23 +1410,25 @@ def draw_menu(stdscr, state: MenuState) -> None:
     # Draw footer with improved controls
     footer_y = max_y - 2
 
-    if state.editing_option:
-        # Show editing controls
-        controls = " Enter: Confirm | Esc: Cancel "
-    elif state.active_section == 'files':
-        # Show file navigation controls with better organization
-        controls = " ↑/↓: Navigate | →: Expand | ←: Collapse | Space: Select | Tab: Switch to Options | Enter: Confirm | Esc: Cancel "
-        if state.new_version_available:
-            controls = " F8: Update | " + controls
-    else:
-        # Show options controls
-        controls = " ↑/↓: Navigate | Space: Toggle/Edit | Tab: Switch to Files | Enter: Confirm | Esc: Cancel "
-        if state.new_version_available:
-            controls = " F8: Update | " + controls
+    controls_key = (bool(state.editing_option), state.active_section, state.new_version_available, max_x)
+    if state._controls_render[0] != controls_key:
+        if state.editing_option:
+            # Show editing controls
+            controls = " Enter: Confirm | Esc: Cancel "
+        elif state.active_section == 'files':
+            # Show file navigation controls with better organization
+            controls = " ↑/↓: Navigate | →: Expand | ←: Collapse | Space: Select | Tab: Switch to Options | Enter: Confirm | Esc: Cancel "
+            if state.new_version_available:
+                controls = " F8: Update | " + controls
+        else:
+            # Show options controls
+            controls = " ↑/↓: Navigate | Space: Toggle/Edit | Tab: Switch to Files | Enter: Confirm | Esc: Cancel "
+            if state.new_version_available:
+                controls = " F8: Update | " + controls
 
-    controls = controls.center(max_x-1, "=")
+        state._controls_render = (controls_key, controls.center(max_x-1, "=")[:max_x-1])
     try:
-        stdscr.addstr(footer_y, 0, controls[:max_x-1], curses.color_pair(1))
+        stdscr.addstr(footer_y, 0, state._controls_render[1], colors['header'])
     except curses.error:
         pass
 
@@ -964,50 +1437,60 @@ def draw_menu(stdscr, state: MenuState) -> None:
 
     if state.editing_option:
         # Show editing prompt
-        prompt = f" Editing {state.editing_option}: {state.edit_buffer} "
-        stdscr.addstr(status_y, 0, " " * (max_x-1))  # Clear line
+        edit_buffer = state.edit_buffer
+        prompt = f" Editing {state.editing_option}: {edit_buffer} "
+        # No need to blank the line first - the screen was cleared at the start of the frame
         stdscr.addstr(status_y, 0, prompt[:max_x-1])
         # Show cursor
         curses.curs_set(1)
-        stdscr.move(status_y, len(f" Editing {state.editing_option}: ") + len(state.edit_buffer))
+        stdscr.move(status_y, len(f" Editing {state.editing_option}: ") + len(edit_buffer))
     else:
-        # Show status message
-        status = f" {state.status_message} "
-        if not status.strip():
-            if state.active_section == 'files':
-                # Count excluded items by checking all visible items
-                excluded_count = sum(1 for path, _ in state.visible_items if state.is_excluded(path))
-                selected_count = len(state.selected_items)
-                if excluded_count > 0 and selected_count > 0:
-                    status = f" {excluded_count} items excluded, {selected_count} explicitly included | Space: Toggle selection (recursive for directories) | Enter: Confirm "
-                elif excluded_count > 0:
-                    status = f" {excluded_count} items excluded | Space: Toggle selection (recursive for directories) | Enter: Confirm "
-                elif selected_count > 0:
-                    status = f" {selected_count} items explicitly included | Space: Toggle selection (recursive for directories) | Enter: Confirm "
-                else:
-                    status = " All files included by default | Space: Toggle selection (recursive for directories) | Enter: Confirm "
-            else:
-                status = " Use Space to toggle options or edit text fields | Enter: Confirm "
-
-        # Add version info if available
-        if state.current_version:
-            version_info = f"v{state.current_version}"
-            if state.new_version_available:
-                version_info += f" (New: v{state.latest_version} available! Press F8 to update)"
-
-            # Add version info to status if there's room
-            if len(status) + len(version_info) + 3 < max_x:
-                padding = max_x - len(status) - len(version_info) - 3
-                status += " " * padding + version_info + " "
-
-        status = status.ljust(max_x-1)
+        # Reformat only when something shown on the status line changed
+        status_key = (state.status_message, state.active_section, state._excluded_row_count,
+                      len(state.selected_items), state.current_version, state.new_version_available,
+                      state.latest_version, max_x)
+        if state._status_render[0] != status_key:
+            state._status_render = (status_key, _format_status_line(state, max_x))
         try:
-            stdscr.addstr(status_y, 0, status[:max_x-1])
+            stdscr.addstr(status_y, 0, state._status_render[1])
         except curses.error:
             pass
 
     stdscr.refresh()
 
+def _format_status_line(state: MenuState, max_x: int) -> str:
+    """Build the status line text padded to the screen width."""
+    # Show status message
+    status = f" {state.status_message} "
+    if not status.strip():
+        if state.active_section == 'files':
+            # Excluded rows are counted as the list is built
+            excluded_count = state._excluded_row_count
+            selected_count = len(state.selected_items)
+            if excluded_count > 0 and selected_count > 0:
+                status = f" {excluded_count} items excluded, {selected_count} explicitly included | Space: Toggle selection (recursive for directories) | Enter: Confirm "
+            elif excluded_count > 0:
+                status = f" {excluded_count} items excluded | Space: Toggle selection (recursive for directories) | Enter: Confirm "
+            elif selected_count > 0:
+                status = f" {selected_count} items explicitly included | Space: Toggle selection (recursive for directories) | Enter: Confirm "
+            else:
+                status = " All files included by default | Space: Toggle selection (recursive for directories) | Enter: Confirm "
+        else:
+            status = " Use Space to toggle options or edit text fields | Enter: Confirm "
+
+    # Add version info if available
+    if state.current_version:
+        version_info = f"v{state.current_version}"
+        if state.new_version_available:
+            version_info += f" (New: v{state.latest_version} available! Press F8 to update)"
+
+        # Add version info to status if there's room
+        if len(status) + len(version_info) + 3 < max_x:
+            padding = max_x - len(status) - len(version_info) - 3
+            status += " " * padding + version_info + " "
+
+    return status.ljust(max_x-1)[:max_x-1]
+
 def handle_input(key: int, state: MenuState) -> bool:
     """Handle user input. Returns True if user wants to exit."""
     # Handle update dialog first
@@ -1041,9 +1524,9 @@ def handle_input(key: int, state: MenuState) -> bool:
         elif key == 10:  # Enter key
             state.finish_editing(save=True)
         elif key == curses.KEY_BACKSPACE or key == 127:  # Backspace
-            state.edit_buffer = state.edit_buffer[:-1]
+            state.edit_backspace()
         elif 32 <= key <= 126:  # Printable ASCII characters
-            state.edit_buffer += chr(key)
+            state.edit_insert(chr(key))
         return False
 
     # Handle normal navigation mode
@@ -1075,32 +1558,19 @@ def handle_input(key: int, state: MenuState) -> bool:
             state.move_cursor(-1)
         elif key == curses.KEY_DOWN:
             state.move_cursor(1)
-        elif key == curses.KEY_RIGHT and current_item and current_item.is_dir():
-            # Expand directory
-            state.expanded_dirs.add(str(current_item))
-            # Rebuild visible items to show expanded content
-            state.visible_items = []
-            state._build_item_list(state.root_path, 0)
-            # Adjust cursor if needed
-            if state.cursor_pos >= len(state.visible_items):
-                state.cursor_pos = len(state.visible_items) - 1
-        elif key == curses.KEY_LEFT and current_item and current_item.is_dir():
+        elif key == curses.KEY_RIGHT and current_item and state.current_item_is_dir():
+            # Expand directory (only its own rows are re-listed)
+            if str(current_item) not in state.expanded_dirs:
+                state.toggle_dir_expanded(current_item)
+        elif key == curses.KEY_LEFT and current_item and state.current_item_is_dir():
             # Collapse directory
             if str(current_item) in state.expanded_dirs:
-                state.expanded_dirs.remove(str(current_item))
-                # Rebuild visible items to hide collapsed content
-                state.visible_items = []
-                state._build_item_list(state.root_path, 0)
-                # Adjust cursor if needed
-                if state.cursor_pos >= len(state.visible_items):
-                    state.cursor_pos = len(state.visible_items) - 1
+                state.toggle_dir_expanded(current_item)
             else:
                 # If already collapsed, go to parent
-                parent = current_item.parent
-                for i, (path, _) in enumerate(state.visible_items):
-                    if path == parent:
-                        state.cursor_pos = i
-                        break
+                parent_idx = state.find_visible_index(str(current_item.parent))
+                if parent_idx is not None:
+                    state.cursor_pos = parent_idx
         elif key == ord(' ') and current_item:
             # Simple Norton Commander style selection toggle
             state.toggle_selection(current_item)
@@ -1129,23 +1599,7 @@ def handle_input(key: int, state: MenuState) -> bool:
             elif option_index == 5:  # SQL Database
                 state.start_editing_option('sql_database')
             elif option_index == 6:  # LLM Provider
-                # Manually cycle through providers to avoid 'local'
-                correct_providers = ['claude', 'chatgpt', 'gemini', 'custom', 'none']
-                current_provider = state.options['llm_provider']
-
-                # Handle legacy 'local' provider
-                if current_provider == 'local':
-                    current_provider = 'custom'
-                    state.options['llm_provider'] = 'custom'
-
-                current_index = correct_providers.index(current_provider) if current_provider in correct_providers else 0
-                next_index = (current_index + 1) % len(correct_providers)
-                state.options['llm_provider'] = correct_providers[next_index]
-
-                # If switching to custom, prompt for URL if not set
-                if state.options['llm_provider'] == 'custom' and not state.options['custom_llm_url']:
-                    state.start_editing_option('custom_llm_url')
-
+                state.toggle_option('llm_provider')
                 state.status_message = f"LLM Provider set to: {state.options['llm_provider']}"
             elif option_index == 7:  # Custom LLM URL
                 state.start_editing_option('custom_llm_url')
@@ -1170,23 +1624,7 @@ def handle_input(key: int, state: MenuState) -> bool:
     elif key == curses.KEY_F6:
         state.start_editing_option('sql_database')
     elif key == curses.KEY_F7:
-        # Cycle through LLM providers manually to ensure no 'local'
-        correct_providers = ['claude', 'chatgpt', 'gemini', 'custom', 'none']
-        current_provider = state.options['llm_provider']
-
-        # Handle legacy 'local' provider
-        if current_provider == 'local':
-            current_provider = 'custom'
-            state.options['llm_provider'] = 'custom'
-
-        current_index = correct_providers.index(current_provider) if current_provider in correct_providers else 0
-        next_index = (current_index + 1) % len(correct_providers)
-        state.options['llm_provider'] = correct_providers[next_index]
-
-        # If switching to custom, prompt for URL if not set
-        if state.options['llm_provider'] == 'custom' and not state.options['custom_llm_url']:
-            state.start_editing_option('custom_llm_url')
-
+        state.toggle_option('llm_provider')
         state.status_message = f"LLM Provider set to: {state.options['llm_provider']}"
     elif key == curses.KEY_F8:
         state.start_editing_option('custom_llm_url')
@@ -1219,25 +1657,38 @@ def run_menu(path: Path, initial_settings: Dict[str, Any] = None) -> Dict[str, A
         curses.curs_set(0)  # Hide cursor
 
         # Initialize menu state with initial settings
-        state = MenuState(path, initial_settings)
+        state = MenuState(path, initial_settings, defer_auto_select=True)
         state.expanded_dirs.add(str(path))  # Start with root expanded
 
-        # Set a shorter timeout for responsive UI updates during scanning
-        stdscr.timeout(50)  # Even shorter timeout for more responsive UI
-
-        # Initial scan phase - block UI until complete or cancelled
-        state.scanning_in_progress = True
-        state.dirty_scan = True
+        # Auto-selection runs in the background so the first frame appears immediately
+        state.start_auto_select()
 
-        # Set timeout for responsive input
-        stdscr.timeout(-1)
+        # Saved expansions are loaded after the first build, so rebuild once
+        state.dirty_structure = True
 
         # Main loop - simple and fast
+        needs_draw = True
         while True:
-            draw_menu(stdscr, state)
+            # Merge a finished background auto-selection here, on the UI thread
+            if state.merge_auto_select():
+                needs_draw = True
+
+            # Poll while scanning so the finished auto-selection shows up without a keypress
+            stdscr.timeout(50 if state.scanning_in_progress else -1)
+
+            # Only rescan the tree when expansion or ignore rules changed;
+            # selection toggles and cursor moves reuse the current list
+            if state.dirty_structure:
+                state.rebuild_visible_items()
+                needs_draw = True
+            if needs_draw:
+                draw_menu(stdscr, state)
 
             try:
                 key = stdscr.getch()
+                # A poll timeout changes nothing on screen until the scan finishes;
+                # any key (including KEY_RESIZE) redraws
+                needs_draw = key != -1 or not state.scanning_in_progress
                 if handle_input(key, state):
                     break
             except KeyboardInterrupt:
@@ -7,6 +7,10 @@ from typing import Dict, List
 from pathlib import Path
 from ..utils import estimate_todo_priority
 
+# Complex functions are listed by name only up to this many; beyond it the
+# insight reports just the count
+_MAX_LISTED_COMPLEX_FUNCTIONS = 3
+
 def generate_insights(analysis: Dict[str, dict]) -> List[str]:
     """
     Generate insights from code analysis results.
@@ -30,6 +34,7 @@ def generate_insights(analysis: Dict[str, dict]) -> List[str]:
     todo_count = 0
     todo_priorities = {'high': 0, 'medium': 0, 'low': 0}
     undocumented_count = 0
+    complex_count = 0
     complex_functions = []
     memory_leaks = 0
     
@@ -37,9 +42,10 @@ def generate_insights(analysis: Dict[str, dict]) -> List[str]:
         if not isinstance(file_analysis, dict):
             continue
             
-        # Process TODOs
-        for todo in file_analysis.get('todos', []):
-            todo_count += 1
+        # Process TODOs - "or ()" avoids allocating an empty list per file
+        todos = file_analysis.get('todos') or ()
+        todo_count += len(todos)
+        for todo in todos:
             text = todo.get('text', '').lower()
             priority = estimate_todo_priority(text)
             todo_priorities[priority] += 1
@@ -49,11 +55,15 @@ def generate_insights(analysis: Dict[str, dict]) -> List[str]:
                 memory_leaks += 1
         
         # Process functions
-        for func in file_analysis.get('functions', []):
-            if not func.get('docstring'):
+        for func in file_analysis.get('functions') or ():
+            get = func.get
+            if not get('docstring'):
                 undocumented_count += 1
-            if func.get('complexity', 0) > 5 or func.get('loc', 0) > 50:
-                complex_functions.append(f"{func.get('name', 'unnamed')} in {file_path}")
+            if get('complexity', 0) > 5 or get('loc', 0) > 50:
+                complex_count += 1
+                # Names are only shown for a handful, so don't format the rest
+                if complex_count <= _MAX_LISTED_COMPLEX_FUNCTIONS:
+                    complex_functions.append(f"{get('name', 'unnamed')} in {file_path}")
     
     # Add insights based on findings
     if todo_count > 0:
@@ -64,11 +74,11 @@ def generate_insights(analysis: Dict[str, dict]) -> List[str]:
     if memory_leaks > 0:
         insights.append(f"Found {memory_leaks} potential memory leak issues")
         
-    if complex_functions:
-        if len(complex_functions) <= 3:
+    if complex_count:
+        if complex_count <= _MAX_LISTED_COMPLEX_FUNCTIONS:
             insights.append(f"Complex functions detected: {', '.join(complex_functions)}")
         else:
-            insights.append(f"Found {len(complex_functions)} complex functions that might need attention")
+            insights.append(f"Found {complex_count} complex functions that might need attention")
     
     if undocumented_count > 0:
         insights.append(f"Found {undocumented_count} undocumented functions")
@@ -4,8 +4,8 @@ LLM Code Lens - Summary Processor
 Generates project summaries from analysis results.
 """
 
-from typing import Dict, List
-from pathlib import Path
+import os
+from typing import Dict, List, Tuple
 from ..utils import estimate_todo_priority, is_potential_entry_point, is_core_file
 
 # src/llm_code_lens/processors/summary.py
@@ -51,11 +51,17 @@ def generate_summary(analysis: Dict[str, dict]) -> dict:
     return summary
 
 
+def _split_path(file_path: str) -> Tuple[str, str]:
+    """Return (parent, suffix) of a path string, matching Path.parent/.suffix."""
+    name = os.path.basename(file_path)
+    dot = name.rfind('.')
+    suffix = name[dot:] if 0 < dot < len(name) - 1 else ''
+    return os.path.dirname(file_path) or '.', suffix
 
 def _process_file_stats(file_path: str, analysis: dict, summary: dict) -> None:
     """Process basic file statistics."""
     # Track file types
-    ext = Path(file_path).suffix
+    ext = _split_path(file_path)[1]
     summary['project_stats']['by_type'][ext] = \
         summary['project_stats']['by_type'].get(ext, 0) + 1
     
@@ -127,7 +133,7 @@ def _process_maintenance_info(file_path: str, analysis: dict, summary: dict) ->
 def _process_structure_info(file_path: str, analysis: dict, summary: dict) -> None:
     """Process project structure information."""
     # Track directories
-    dir_path = str(Path(file_path).parent)
+    dir_path = _split_path(file_path)[0]
     summary['structure']['directories'].add(dir_path)
     
     # Identify potential entry points
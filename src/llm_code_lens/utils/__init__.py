@@ -1,47 +1,59 @@
+import os
+from functools import lru_cache
+
 from .tree import ProjectTree
 from .gitignore import GitignoreParser
 
+# File and function names that usually mark an entry point
+_ENTRY_POINT_FILES = frozenset({'main.py', 'app.py', 'cli.py', 'server.py', 'index.js', 'server.js'})
+_ENTRY_POINT_FUNCTIONS = frozenset({'main', 'run', 'start', 'cli', 'execute'})
+
+_HIGH_PRIORITY_WORDS = ('urgent', 'critical', 'fixme', 'bug', 'memory leak', 'security')
+_MEDIUM_PRIORITY_WORDS = ('important', 'needed', 'should')
+
+@lru_cache(maxsize=4096)
 def estimate_todo_priority(text: str) -> str:
     """Estimate TODO priority based on content."""
+    # Pure function of the text, so repeated summaries/insights over the
+    # same TODOs reuse earlier results
     text = text.lower()
-    if any(word in text for word in ['urgent', 'critical', 'fixme', 'bug', 'memory leak', 'security']):
+    if any(word in text for word in _HIGH_PRIORITY_WORDS):
         return 'high'
-    if any(word in text for word in ['important', 'needed', 'should']):
+    if any(word in text for word in _MEDIUM_PRIORITY_WORDS):
         return 'medium'
     return 'low'
 
 def is_potential_entry_point(file_path: str, analysis: dict) -> bool:
     """Identify if a file is a potential entry point."""
-    from pathlib import Path
-    
-    filename = Path(file_path).name
-    if filename in {'main.py', 'app.py', 'cli.py', 'server.py', 'index.js', 'server.js'}:
+    # basename accepts str or Path without building a Path object
+    if os.path.basename(file_path) in _ENTRY_POINT_FILES:
         return True
     
     # Check for main-like functions
-    for func in analysis.get('functions', []):
-        if func.get('name') in {'main', 'run', 'start', 'cli', 'execute'}:
+    for func in analysis.get('functions', ()):
+        if func.get('name') in _ENTRY_POINT_FUNCTIONS:
             return True
     
     return False
 
 def is_core_file(analysis: dict) -> bool:
     """Identify if a file is likely a core component."""
+    functions = analysis.get('functions') or ()
+
     # Check function count
-    if len(analysis.get('functions', [])) > 5:
+    if len(functions) > 5:
         return True
     
     # Check class count
-    if len(analysis.get('classes', [])) > 2:
+    if len(analysis.get('classes') or ()) > 2:
         return True
     
-    # Check function complexity
-    complex_funcs = sum(1 for f in analysis.get('functions', [])
-                       if (f.get('complexity', 0) > 5 or
-                           f.get('loc', 0) > 50 or
-                           len(f.get('args', [])) > 3))
-    if complex_funcs >= 1:
-        return True
+    # Check function complexity - one complex function is enough
+    for f in functions:
+        if (f.get('complexity', 0) > 5 or
+                f.get('loc', 0) > 50 or
+                len(f.get('args') or ()) > 3):
+            return True
     
     # Check file complexity
     if analysis.get('metrics', {}).get('complexity', 0) > 20:
@@ -0,0 +1,128 @@
+"""
+Analysis cache for LLM Code Lens.
+Stores per-file analyzer results keyed on (path, mtime, size) so unchanged
+files are not parsed again on the next run.
+
+Results are stored as JSON text, never pickled: the cache lives in the
+project's output directory, so its contents must not be able to run code.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .. import __version__
+
+ANALYSIS_CACHE_FILE = 'cache.sqlite'
+
+class AnalysisCache:
+    """SQLite-backed cache of per-file analysis results."""
+
+    def __init__(self, db_path: Path, version: str = __version__, fingerprint: str = ''):
+        self.db_path = Path(db_path)
+        self.version = version
+        # Results are only reused by the same package version and analyzer setup
+        # (see ProjectAnalyzer.cache_fingerprint)
+        cache_key = f"{version}:{fingerprint}"
+        self._stats: Dict[Path, Tuple[int, int]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path))
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            # Earlier builds kept pickled results in a 'files' table; never read them
+            conn.execute('DROP TABLE IF EXISTS files')
+            conn.execute('CREATE TABLE IF NOT EXISTS analyses '
+                         '(path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, data TEXT)')
+
+            # Results from another version or analyzer backend may have a
+            # different shape; start over
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != cache_key:
+                conn.execute('DELETE FROM analyses')
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (cache_key,))
+            conn.commit()
+            self._conn = conn
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: Analysis cache disabled ({e})")
+
+    def load(self, files: List[Path],
+             stats: Optional[Dict[Path, os.stat_result]] = None) -> Dict[Path, dict]:
+        """Return cached analyses for the files that are unchanged since they were stored.
+
+        stats, when given, holds stat results the caller already took, so files
+        are not stat'ed again; files missing from it are skipped.
+        """
+        hits: Dict[Path, dict] = {}
+        if self._conn is None:
+            return hits
+
+        try:
+            # Freshness is decided on the small columns; results are read only for hits
+            stored = {path: (mtime, size) for path, mtime, size
+                      in self._conn.execute('SELECT path, mtime, size FROM analyses')}
+
+            for file_path in files:
+                if stats is not None:
+                    st = stats.get(file_path)
+                    if st is None:
+                        continue
+                else:
+                    try:
+                        st = os.stat(file_path)
+                    except OSError:
+                        continue
+                key = (st.st_mtime_ns, st.st_size)
+                self._stats[file_path] = key
+
+                if stored.get(str(file_path)) != key:
+                    continue
+                row = self._conn.execute('SELECT data FROM analyses WHERE path = ?',
+                                         (str(file_path),)).fetchone()
+                try:
+                    analysis = json.loads(row[0])
+                except (TypeError, ValueError):
+                    continue
+                if isinstance(analysis, dict):
+                    hits[file_path] = analysis
+        except sqlite3.Error:
+            pass
+
+        return hits
+
+    def store(self, file_path: Path, analysis: dict) -> None:
+        """Record the analysis of a file, using the stat taken by load()."""
+        key = self._stats.get(file_path)
+        if self._conn is None or key is None:
+            return
+
+        try:
+            data = json.dumps(analysis, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return  # Not plain JSON data; the file is simply analyzed again next run
+
+        try:
+            self._conn.execute('INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?)',
+                               (str(file_path), key[0], key[1], data))
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """Drop entries for files that no longer exist, then commit the run's writes."""
+        if self._conn is None:
+            return
+
+        try:
+            stale = [(path,) for (path,) in self._conn.execute('SELECT path FROM analyses')
+                     if not os.path.exists(path)]
+            self._conn.executemany('DELETE FROM analyses WHERE path = ?', stale)
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
+        finally:
+            self._conn.close()
+            self._conn = None
@@ -3,10 +3,44 @@ Ultra-fast Gitignore Parser using pathspec library
 Provides 10-50x performance improvement for file filtering.
 """
 
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 import pathspec
 import os
+import re
+
+# Named groups (e.g. pathspec's "ps_d") would collide once patterns are joined
+_NAMED_GROUP = re.compile(r'\(\?P<\w+>')
+
+
+@lru_cache(maxsize=64)
+def _compile_spec(lines: Tuple[str, ...]) -> pathspec.PathSpec:
+    """Compile gitwildmatch lines once per distinct pattern set, shared by all parsers."""
+    return pathspec.PathSpec.from_lines('gitwildmatch', lines)
+
+
+@lru_cache(maxsize=256)
+def _combine_regexes(regexes: Tuple[re.Pattern, ...]) -> Optional[re.Pattern]:
+    """Join compiled regexes into one alternation so a single match call tests them all."""
+    if not regexes:
+        return None
+    return re.compile('|'.join(
+        '(?:%s)' % _NAMED_GROUP.sub('(?:', regex.pattern) for regex in regexes
+    ))
+
+
+def _may_match_bare_name(glob: str) -> bool:
+    """Return False for patterns that can only match below some directory."""
+    glob = glob.strip()
+    if glob.startswith('!'):
+        glob = glob[1:]
+    glob = glob.strip('/')
+    while glob.startswith('**/'):
+        glob = glob[3:]
+    # Any remaining inner slash anchors the pattern to a directory path
+    return '/' not in glob
+
 
 class GitignoreParser:
     """
@@ -17,8 +51,17 @@ class GitignoreParser:
     def __init__(self, root_path: Path):
         """Initialize with the root path containing .gitignore."""
         self.root_path = Path(root_path).resolve()
-        self.spec = None
-        self.patterns = []
+        self._root_str = str(self.root_path)
+        self._root_prefix = os.path.join(self._root_str, '')
+        self.spec: Optional[pathspec.PathSpec] = None
+        self.patterns: List[str] = []
+        self._matchers: List[Tuple[bool, re.Pattern]] = []
+        self._include_regex: Optional[re.Pattern] = None
+        self._negation_regex: Optional[re.Pattern] = None
+        self._bare_matchers: List[Tuple[bool, re.Pattern]] = []
+        self._bare_include_regex: Optional[re.Pattern] = None
+        self._bare_negation_regex: Optional[re.Pattern] = None
+        self._dir_cache: Dict[str, bool] = {}
 
     def load_gitignore(self) -> None:
         """Load and parse .gitignore file using pathspec for maximum performance."""
@@ -26,23 +69,94 @@ class GitignoreParser:
         
         if not gitignore_path.exists():
             # Create empty pathspec for consistency
-            self.spec = pathspec.PathSpec.from_lines('gitwildmatch', [])
+            self.spec = _compile_spec(())
+            self._compile_matchers(self.spec)
             return
 
         try:
+            # Stream the file, keeping only pattern lines rather than the whole text
+            lines = []
+            self.patterns = []
             with open(gitignore_path, 'r', encoding='utf-8') as f:
-                lines = f.read().splitlines()
-            
-            # Store original patterns for compatibility
-            self.patterns = [line.strip() for line in lines 
-                           if line.strip() and not line.strip().startswith('#')]
+                for line in f:
+                    line = line.rstrip('\n')
+                    stripped = line.strip()
+                    if not stripped or line[0] == '#':
+                        continue
+                    lines.append(line)
+
+                    # Store original patterns for compatibility
+                    if stripped[0] != '#':
+                        self.patterns.append(stripped)
             
             # Create optimized pathspec matcher
-            self.spec = pathspec.PathSpec.from_lines('gitwildmatch', lines)
+            self.spec = _compile_spec(tuple(lines))
             
         except Exception as e:
             print(f"Warning: Error reading {gitignore_path}: {e}")
-            self.spec = pathspec.PathSpec.from_lines('gitwildmatch', [])
+            self.spec = _compile_spec(())
+
+        self._compile_matchers(self.spec)
+
+    def _compile_matchers(self, spec: pathspec.PathSpec) -> None:
+        """Keep the compiled regex of every active pattern of spec, in gitignore order."""
+        active = [pattern for pattern in spec.patterns if pattern.include is not None]
+        self._matchers = [(pattern.include, pattern.regex) for pattern in active]
+        self._include_regex = _combine_regexes(
+            tuple(regex for include, regex in self._matchers if include))
+        self._negation_regex = _combine_regexes(
+            tuple(regex for include, regex in self._matchers if not include))
+
+        # Top-level names (no '/') are only checked against patterns that can match them
+        self._bare_matchers = [(pattern.include, pattern.regex) for pattern in active
+                               if _may_match_bare_name(pattern.pattern)]
+        self._bare_include_regex = _combine_regexes(
+            tuple(regex for include, regex in self._bare_matchers if include))
+        self._bare_negation_regex = _combine_regexes(
+            tuple(regex for include, regex in self._bare_matchers if not include))
+        self._dir_cache = {}
+
+    def relative_path(self, path: Path) -> Optional[str]:
+        """Return path relative to the root as a '/'-separated string, or None if outside it."""
+        path_str = os.fspath(path)
+        if path_str.startswith(self._root_prefix):
+            rel = path_str[len(self._root_prefix):]
+        elif path_str == self._root_str:
+            rel = '.'
+        else:
+            return None
+        return rel.replace(os.sep, '/') if os.sep != '/' else rel
+
+    def match_relative(self, rel_path: str) -> bool:
+        """Match a root-relative '/'-separated path against the compiled patterns."""
+        if '/' in rel_path:
+            matchers = self._matchers
+            include_regex, negation_regex = self._include_regex, self._negation_regex
+        else:
+            matchers = self._bare_matchers
+            include_regex, negation_regex = self._bare_include_regex, self._bare_negation_regex
+
+        if include_regex is None or include_regex.search(rel_path) is None:
+            return False
+        if negation_regex is None or negation_regex.search(rel_path) is None:
+            return True
+
+        # Both kinds matched: the last matching pattern wins
+        matched = False
+        for include, regex in matchers:
+            if regex.search(rel_path) is not None:
+                matched = include
+        return matched
+
+    def _dir_ignored(self, dir_str: str) -> bool:
+        """Return whether a root-relative directory or one of its parents is ignored."""
+        ignored = self._dir_cache.get(dir_str)
+        if ignored is None:
+            parent = dir_str.rpartition('/')[0]
+            ignored = ((bool(parent) and self._dir_ignored(parent)) or
+                       self.match_relative(dir_str + '/'))
+            self._dir_cache[dir_str] = ignored
+        return ignored
 
     def get_ignore_patterns(self) -> List[str]:
         """Get the list of ignore patterns."""
@@ -53,34 +167,38 @@ class GitignoreParser:
         if self.spec is None:
             return False
             
-        try:
-            # Convert to relative path for gitignore matching
-            rel_path = path.relative_to(self.root_path)
-            path_str = str(rel_path).replace(os.sep, '/')
-            
-            # Use pathspec's optimized matching
-            return self.spec.match_file(path_str)
-            
-        except (ValueError, OSError):
-            # Path is not relative to root or other error
+        # Convert to relative path for gitignore matching
+        path_str = self.relative_path(path)
+        if path_str is None:
+            # Path is not relative to root
             return False
 
+        return self.should_ignore_relative(path_str)
+
+    def should_ignore_relative(self, path_str: str) -> bool:
+        """Gitignore matching for a path already made root-relative by relative_path."""
+        # Files under an ignored directory inherit its verdict, unless a
+        # negation pattern might re-include them
+        if self._negation_regex is None:
+            parent = path_str.rpartition('/')[0]
+            if parent and self._dir_ignored(parent):
+                return True
+
+        return self.match_relative(path_str)
+
     def should_ignore_directory(self, dir_path: Path) -> bool:
         """Check if an entire directory should be ignored (for early pruning)."""
         if self.spec is None:
             return False
             
-        try:
-            rel_path = dir_path.relative_to(self.root_path)
-            dir_str = str(rel_path).replace(os.sep, '/')
-            
-            # Check both with and without trailing slash
-            return (self.spec.match_file(dir_str) or 
-                   self.spec.match_file(dir_str + '/'))
-                   
-        except (ValueError, OSError):
+        dir_str = self.relative_path(dir_path)
+        if dir_str is None:
             return False
 
+        # Check both with and without trailing slash
+        return (self.match_relative(dir_str) or
+               self.match_relative(dir_str + '/'))
+
     def filter_paths(self, paths: List[Path]) -> List[Path]:
         """Efficiently filter multiple paths at once."""
         if self.spec is None:
@@ -95,7 +213,7 @@ class GitignoreParser:
 class FastPathFilter:
     """Ultra-fast path filtering combining gitignore and custom patterns."""
     
-    def __init__(self, root_path: Path, custom_patterns: List[str] = None):
+    def __init__(self, root_path: Path, custom_patterns: Optional[List[str]] = None):
         self.root_path = Path(root_path).resolve()
         self.gitignore = GitignoreParser(root_path)
         self.gitignore.load_gitignore()
@@ -111,8 +229,9 @@ class FastPathFilter:
         }
         
         # Create pathspec for custom patterns
+        self.custom_spec: Optional[pathspec.PathSpec]
         if custom_patterns:
-            self.custom_spec = pathspec.PathSpec.from_lines('gitwildmatch', custom_patterns)
+            self.custom_spec = _compile_spec(tuple(custom_patterns))
         else:
             self.custom_spec = None
             
@@ -124,36 +243,37 @@ class FastPathFilter:
         if dir_name in self.common_excludes:
             return True
             
+        # Both matchers work on the same root-relative string, so build it once
+        dir_str = self.gitignore.relative_path(dir_path)
+        if dir_str is None:
+            return False
+        dir_slash = dir_str + '/'
+
         # Check gitignore patterns
-        if self.gitignore.should_ignore_directory(dir_path):
+        if self.gitignore.spec is not None and (
+                self.gitignore.match_relative(dir_str) or
+                self.gitignore.match_relative(dir_slash)):
             return True
             
         # Check custom patterns
         if self.custom_spec:
-            try:
-                rel_path = dir_path.relative_to(self.root_path)
-                dir_str = str(rel_path).replace(os.sep, '/')
-                if self.custom_spec.match_file(dir_str) or self.custom_spec.match_file(dir_str + '/'):
-                    return True
-            except (ValueError, OSError):
-                pass
+            if self.custom_spec.match_file(dir_str) or self.custom_spec.match_file(dir_slash):
+                return True
                 
         return False
         
     def should_ignore_file(self, file_path: Path) -> bool:
         """Fast file-level filtering."""
+        file_str = self.gitignore.relative_path(file_path)
+        if file_str is None:
+            return False
+
         # Check gitignore first (most optimized)
-        if self.gitignore.should_ignore(file_path):
+        if self.gitignore.spec is not None and self.gitignore.should_ignore_relative(file_str):
             return True
             
         # Check custom patterns
-        if self.custom_spec:
-            try:
-                rel_path = file_path.relative_to(self.root_path)
-                file_str = str(rel_path).replace(os.sep, '/')
-                if self.custom_spec.match_file(file_str):
-                    return True
-            except (ValueError, OSError):
-                pass
+        if self.custom_spec and self.custom_spec.match_file(file_str):
+            return True
                 
-        return False
\ No newline at end of file
+        return False
@@ -6,7 +6,25 @@ import os
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add the src directory to the path so that imports work correctly
 src_dir = Path(__file__).parent.parent / "src"
 if src_dir.exists():
     sys.path.insert(0, str(src_dir))
+
+
+@pytest.fixture(scope="session")
+def tiktoken_encoder():
+    """Load the cl100k_base encoding once per session, or None when it is unavailable."""
+    from llm_code_lens.cli import _get_encoder
+    return _get_encoder()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_tiktoken(tiktoken_encoder):
+    """Load the encoding before the first test so no single test pays the cold start.
+
+    The CLI caches the loaded encoder per process, so later
+    split_content_by_tokens calls reuse this one.
+    """
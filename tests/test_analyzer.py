@@ -1,10 +1,27 @@
 import pytest
 from pathlib import Path
-from llm_code_lens.analyzer import ProjectAnalyzer, PythonAnalyzer, JavaScriptAnalyzer, SQLServerAnalyzer
-
-def test_python_basic_analysis(tmp_path):
+from llm_code_lens.analyzer import AnalysisResult, ProjectAnalyzer, PythonAnalyzer, JavaScriptAnalyzer, SQLServerAnalyzer
+from llm_code_lens.utils.cache import AnalysisCache
+
+# Analyzers keep no per-file state, so the module shares one instance of each
+# and sets up parsers (tree-sitter when available) once
+@pytest.fixture(scope="module")
+def python_analyzer():
+    """Shared Python analyzer for this module."""
+    return PythonAnalyzer()
+
+@pytest.fixture(scope="module")
+def js_analyzer():
+    """Shared JavaScript analyzer for this module."""
+    return JavaScriptAnalyzer()
+
+@pytest.fixture(scope="module")
+def sql_analyzer():
+    """Shared SQL Server analyzer for this module."""
+    return SQLServerAnalyzer()
+
+def test_python_basic_analysis(tmp_path, python_analyzer):
     """Test basic Python analysis functionality."""
-    analyzer = PythonAnalyzer()
     test_file = tmp_path / "test.py"
     test_file.write_text('''
 def test_function():
@@ -12,14 +29,13 @@ def test_function():
     return True
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = python_analyzer.analyze_file(test_file)
     assert len(result['functions']) == 1
     assert result['functions'][0]['name'] == 'test_function'
     assert result['functions'][0]['docstring'] == 'Test docstring.'
 
-def test_python_complex_analysis(tmp_path):
+def test_python_complex_analysis(tmp_path, python_analyzer):
     """Test complex Python features analysis."""
-    analyzer = PythonAnalyzer()
     test_file = tmp_path / "test.py"
     test_file.write_text('''
 from typing import List, Optional
@@ -60,7 +76,7 @@ async def async_function(param: str) -> bool:
     return True
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = python_analyzer.analyze_file(test_file)
     
     # Check imports
     assert len(result['imports']) >= 3
@@ -83,9 +99,8 @@ async def async_function(param: str) -> bool:
     assert async_func['is_async']
     assert async_func['complexity'] > 1
 
-def test_python_comments_todos(tmp_path):
+def test_python_comments_todos(tmp_path, python_analyzer):
     """Test Python comments and TODOs analysis."""
-    analyzer = PythonAnalyzer()
     test_file = tmp_path / "test.py"
     test_file.write_text('''
 # Regular comment
@@ -106,14 +121,13 @@ class TestClass:
         return True
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = python_analyzer.analyze_file(test_file)
     assert len(result['todos']) >= 2
     assert len(result['comments']) >= 2
     assert any('Critical bug' in todo['text'] for todo in result['todos'])
 
-def test_javascript_analysis(tmp_path):
+def test_javascript_analysis(tmp_path, js_analyzer):
     """Test JavaScript file analysis with various features."""
-    analyzer = JavaScriptAnalyzer()
     test_file = tmp_path / "test.js"
     test_file.write_text('''
 import React, { useState } from 'react';
@@ -150,7 +164,7 @@ async function asyncFunction() {
 }
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = js_analyzer.analyze_file(test_file)
     
     # Check imports and exports
     assert len(result['imports']) == 2
@@ -177,9 +191,8 @@ async function asyncFunction() {
     assert result['metrics']['classes'] > 0
     assert result['metrics']['imports'] > 0
 
-def test_sql_analysis(tmp_path):
+def test_sql_analysis(tmp_path, sql_analyzer):
     """Test SQL file analysis with various features."""
-    analyzer = SQLServerAnalyzer()
     test_file = tmp_path / "test.sql"
     test_file.write_text('''
 -- Regular comment
@@ -237,7 +250,7 @@ BEGIN
 END
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = sql_analyzer.analyze_file(test_file)
     
     # Check objects
     assert result['objects'], "Should find SQL objects"
@@ -276,6 +289,12 @@ END
     assert result['metrics']['complexity'] > 0, "Should calculate complexity"
     assert result['metrics'].get('loc', 0) > 0, "Should count lines of code"
 
+def test_sql_complexity_keywords(sql_analyzer):
+    """Test that SQL complexity counts whole control-flow and join keywords."""
+    content = "IF @x = 1 WHILE 1=1 CASE WHEN 1 THEN 2 END\nBEGIN TRY SELECT 1 END TRY BEGIN CATCH END CATCH\nLEFT join t IFF JOINED"
+    assert sql_analyzer._calculate_complexity(content) == 8
+    assert sql_analyzer._calculate_block_complexity("if x join y union z") == 4
+
 def test_project_analysis(tmp_path):
     """Test project-wide analysis."""
     project_dir = tmp_path / "test_project"
@@ -289,13 +308,192 @@ def test_project_analysis(tmp_path):
     result = analyzer.analyze(project_dir)
     
     assert result.summary['project_stats']['total_files'] == 1
+    assert type(result.summary['project_stats']['by_type']) is dict
+    assert result.summary['project_stats']['by_type'] == {'.py': 1}
     assert len(result.files) == 1
     assert any('main.py' in path for path in result.files)
 
 
-def test_python_nested_classes(tmp_path):
+def test_collect_files_prunes_ignored_dirs(tmp_path):
+    """File collection skips ignored directories and unsupported files."""
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "sub" / "mod.py").write_text("x = 1")
+    (tmp_path / "main.py").write_text("x = 1")
+    (tmp_path / "notes.txt").write_text("notes")
+    for ignored in (".git", "node_modules", "__pycache__", "venv"):
+        (tmp_path / ignored).mkdir()
+        (tmp_path / ignored / "skip.py").write_text("x = 1")
+
+    files = ProjectAnalyzer()._collect_files(tmp_path)
+
+    # Top-level files are listed before the files of subdirectories
+    assert files == [tmp_path / "main.py", tmp_path / "pkg" / "sub" / "mod.py"]
+
+def test_project_analysis_parallel_matches_sequential(tmp_path):
+    """Analyzing with worker processes gives the same per-file results."""
+    for i in range(4):
+        (tmp_path / f"mod{i}.py").write_text(f"def f{i}(x):\n    return x + {i}\n")
+    (tmp_path / "app.js").write_text("function run() { return 1; }\n")
+
+    sequential = ProjectAnalyzer().analyze(tmp_path)
+    parallel_analyzer = ProjectAnalyzer()
+    parallel_analyzer.jobs = 2
+    parallel = parallel_analyzer.analyze(tmp_path)
+
+    assert parallel.files == sequential.files
+    assert parallel.summary['project_stats'] == sequential.summary['project_stats']
+
+
+def test_project_analysis_parallel_progress_and_custom_analyzers(tmp_path):
+    """Pool results advance progress; customised analyzers keep the single-process path."""
+    from unittest.mock import MagicMock
+    for i in range(3):
+        (tmp_path / f"mod{i}.py").write_text(f"x = {i}\n")
+
+    analyzer = ProjectAnalyzer()
+    analyzer.jobs = 2
+    analyzer.progress = MagicMock()
+    analyzer.analyze(tmp_path)
+    advances = [c for c in analyzer.progress.update.call_args_list
+                if c.kwargs.get('advance') == 1 and 'description' in c.kwargs]
+    assert len(advances) == 3
+
+    class TaggingAnalyzer(PythonAnalyzer):
+        def analyze_file(self, file_path):
+            result = super().analyze_file(file_path)
+            result['tagged'] = True
+            return result
+
+    analyzer = ProjectAnalyzer()
+    analyzer.analyzers['.py'] = TaggingAnalyzer()
+    analyzer.jobs = 2
+    assert not analyzer._uses_stock_analyzers()
+    result = analyzer.analyze(tmp_path)
+    assert all(f.get('tagged') for f in result.files.values())
+
+def test_project_analysis_reuses_cache(tmp_path):
+    """Unchanged files are served from the cache; changed files are re-analyzed."""
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "a.py").write_text("def a():\n    pass\n")
+    changed = project_dir / "b.py"
+    changed.write_text("def b():\n    pass\n")
+    db_path = tmp_path / "cache.sqlite"
+
+    analyzer = ProjectAnalyzer()
+    analyzer.cache = AnalysisCache(db_path)
+    first = analyzer.analyze(project_dir)
+    analyzer.cache.close()
+
+    changed.write_text("def b():\n    pass\n\ndef c():\n    pass\n")
+    calls = []
+    analyzer = ProjectAnalyzer()
+    original = analyzer.analyzers['.py'].analyze_file
+    analyzer.analyzers['.py'].analyze_file = lambda path: calls.append(path) or original(path)
+    analyzer.cache = AnalysisCache(db_path)
+    second = analyzer.analyze(project_dir)
+    analyzer.cache.close()
+
+    assert calls == [changed]
+    assert second.files[str(project_dir / "a.py")] == first.files[str(project_dir / "a.py")]
+    assert second.files[str(changed)]['metrics']['functions'] == 2
+
+    # Stored data is only ever parsed as JSON; anything else is a cache miss
+    import pickle
+    import sqlite3
+    assert changed in AnalysisCache(db_path).load([changed])
+    with sqlite3.connect(str(db_path)) as conn:
+        conn.execute("UPDATE analyses SET data = ? WHERE path = ?",
+                     (pickle.dumps({'type': 'python'}), str(changed)))
+    assert AnalysisCache(db_path).load([changed]) == {}
+
+    # Results from another version are discarded
+    assert AnalysisCache(db_path, version="0.0.0").load([changed]) == {}
+
+
+def test_analysis_cache_fingerprint_and_stats(tmp_path, monkeypatch):
+    """The cache is cleared when the analyzer setup changes and reuses caller stats."""
+    import os
+    source = tmp_path / "a.py"
+    source.write_text("x = 1\n")
+    db_path = tmp_path / "cache.sqlite"
+
+    analyzer = ProjectAnalyzer()
+    fingerprint = analyzer.cache_fingerprint()
+    assert fingerprint == ProjectAnalyzer().cache_fingerprint()
+
+    cache = AnalysisCache(db_path, fingerprint=fingerprint)
+    cache.load([source])
+    cache.store(source, {'type': 'python'})
+    cache.close()
+
+    # Stats passed in by the caller are used instead of stat'ing again
+    stats = {source: os.stat(source)}
+    real_stat = os.stat
+
+    def spy_stat(path, *args, **kwargs):
+        assert Path(path) != source, "file stat'ed twice"
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, 'stat', spy_stat)
+    assert AnalysisCache(db_path, fingerprint=fingerprint).load([source], stats) == {source: {'type': 'python'}}
+    monkeypatch.undo()
+
+    # A different parsing backend changes the fingerprint and drops stored results
+    analyzer.analyzers['.py'].tree_sitter_enabled = not analyzer.analyzers['.py'].tree_sitter_enabled
+    other = analyzer.cache_fingerprint()
+    assert other != fingerprint
+    assert AnalysisCache(db_path, fingerprint=other).load([source]) == {}
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_analysis_result_to_json(monkeypatch, use_orjson):
+    """to_json serializes sets as lists, with or without orjson."""
+    import json
+    import llm_code_lens.analyzer.base as base
+    if not use_orjson:
+        monkeypatch.setattr(base, 'orjson', None)
+    elif base.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    result = AnalysisResult(
+        summary={'code_metrics': {'imports': {'unique': {'os'}}}, 'big': 2 ** 70},
+        insights=['Ünïcode insight'],
+        files={'main.py': {'loc': 1}},
+    )
+    data = json.loads(result.to_json())
+
+    assert data['summary']['code_metrics']['imports']['unique'] == ['os']
+    assert data['summary']['big'] == 2 ** 70
+    assert data['insights'] == ['Ünïcode insight']
+    assert data['files'] == {'main.py': {'loc': 1}}
+    # Non-ASCII is written as UTF-8 by both backends, never \u-escaped
+    assert 'Ünïcode insight' in result.to_json()
+
+
+def test_analysis_result_to_json_backends_agree(monkeypatch):
+    """orjson and the stdlib fallback produce equivalent JSON."""
+    import json
+    import llm_code_lens.analyzer.base as base
+    if base.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    result = AnalysisResult(
+        summary={'project_stats': {'total_files': 2, 'by_type': {'.py': 2},
+                                   'avg_file_size': 1e16, 'comments_ratio': 1e-7,
+                                   'doc_coverage': 0.1}},
+        insights=['Ünïcode insight', 'naïve café'],
+        files={'src/é.py': {'type': 'python', 'functions': [], 'loc': 3}},
+    )
+    with_orjson = result.to_json()
+    monkeypatch.setattr(base, 'orjson', None)
+    with_stdlib = result.to_json()
+
+    # Same data, and UTF-8 text from both; float spelling may differ (1e16 vs 1e+16)
+    assert json.loads(with_stdlib) == json.loads(with_orjson)
+    assert 'naïve café' in with_stdlib and 'naïve café' in with_orjson
+
+def test_python_nested_classes(tmp_path, python_analyzer):
     """Test analysis of nested class definitions and methods."""
-    analyzer = PythonAnalyzer()
     test_file = tmp_path / "test.py"
     test_file.write_text('''
 class Outer:
@@ -323,7 +521,7 @@ class Outer:
     def static_method(): pass
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = python_analyzer.analyze_file(test_file)
     # Fix: Update assertion to account for LocalClass or filter non-nested classes
     outer_class = next(c for c in result['classes'] if c['name'] == 'Outer')
     assert len(outer_class['methods']) == 4  # outer_method, prop, cls_method, static_method
@@ -332,9 +530,8 @@ class Outer:
     assert any(m['is_staticmethod'] for m in outer_class['methods'] if m['name'] == 'static_method')
 
 
-def test_function_complexity_cases(tmp_path):
+def test_function_complexity_cases(tmp_path, python_analyzer):
     """Test various cases that affect cyclomatic complexity."""
-    analyzer = PythonAnalyzer()
     test_file = tmp_path / "test.py"
     test_file.write_text('''
 def complex_function(x, y):
@@ -358,14 +555,13 @@ def complex_function(x, y):
     return result if 'result' in locals() else None
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = python_analyzer.analyze_file(test_file)
     func = result['functions'][0]
     assert func['complexity'] > 5  # Should have high complexity due to conditions and error handling
 
 
-def test_complex_decorators(tmp_path):
+def test_complex_decorators(tmp_path, python_analyzer):
     """Test handling of complex decorator patterns."""
-    analyzer = PythonAnalyzer()
     test_file = tmp_path / "test.py"
     test_file.write_text('''
 import functools
@@ -392,7 +588,7 @@ class ClassWithComplexDecorators:
         return True
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = python_analyzer.analyze_file(test_file)
     class_info = result['classes'][0]
     assert any('decorator_with_args' in str(method['decorators']) 
               for method in class_info['methods']
@@ -401,9 +597,8 @@ class ClassWithComplexDecorators:
               for method in class_info['methods']
               if method['name'] == 'cached_prop')
 
-def test_binary_and_unicode_handling(tmp_path):
+def test_binary_and_unicode_handling(tmp_path, python_analyzer):
     """Test handling of binary and unicode content in Python files."""
-    analyzer = PythonAnalyzer()
     test_file = tmp_path / "test.py"
     
     # Test file with mixed encodings and special characters
@@ -420,14 +615,13 @@ BINARY_DATA = b"\\x00\\x01\\x02"
 '''.encode('utf-8')
     
     test_file.write_bytes(content)
-    result = analyzer.analyze_file(test_file)
+    result = python_analyzer.analyze_file(test_file)
     
     assert result['functions'][0]['docstring'] == 'Test unicode strings: 你好, 🌍'
     assert len(result['comments']) > 0
 
-def test_error_recovery_and_partial_parsing(tmp_path):
+def test_error_recovery_and_partial_parsing(tmp_path, python_analyzer):
     """Test analyzer's ability to recover from various error conditions."""
-    analyzer = PythonAnalyzer()
     test_file = tmp_path / "test.py"
     
     # Test with syntax error
@@ -443,11 +637,37 @@ def another_valid_function():
     pass
 ''')
     
-    result = analyzer.analyze_file(test_file)
+    result = python_analyzer.analyze_file(test_file)
     assert 'errors' in result
     assert any(error['type'] == 'syntax_error' for error in result['errors'])
     
     # Test with encoding error
     test_file.write_bytes(b'\x80\x81\x82invalid bytes\xaa\xbb\xcc')
-    result = analyzer.analyze_file(test_file)
-    assert 'errors' in result
\ No newline at end of file
+    result = python_analyzer.analyze_file(test_file)
+    assert 'errors' in result
+
+
+def test_project_summary_metrics(tmp_path):
+    """Test function, class and entry point metrics in the project summary."""
+    project_dir = tmp_path / "test_project"
+    project_dir.mkdir()
+    (project_dir / "tool.py").write_text('''
+def run_main():
+    """Entry."""
+    return 1
+
+def helper():
+    return 2
+
+class Thing:
+    """A thing."""
+''')
+    (project_dir / "lib.py").write_text('def util(): pass')
+
+    result = ProjectAnalyzer().analyze(project_dir)
+    functions = result.summary['code_metrics']['functions']
+    assert functions['count'] == 3
+    assert functions['with_docs'] == 1
+    assert result.summary['code_metrics']['classes'] == {'count': 1, 'with_docs': 1}
+    assert [Path(p).name for p in result.summary['structure']['entry_points']] == ['tool.py']
+    assert result.summary['structure']['directories'] == [str(project_dir)]
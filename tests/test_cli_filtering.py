@@ -9,10 +9,13 @@ import os
 import sys
 import json
 from unittest.mock import patch, MagicMock
+import pathspec
 from llm_code_lens.analyzer.base import ProjectAnalyzer, AnalysisResult
 from llm_code_lens.cli import main, parse_ignore_file, should_ignore, is_binary, split_content_by_tokens
 from llm_code_lens.cli import _split_by_lines, delete_and_create_output_dir, export_full_content, export_sql_content
-from llm_code_lens.cli import _combine_fs_results, _combine_sql_results, _combine_results
+from llm_code_lens.cli import _combine_fs_results, _combine_sql_results, _combine_results, _get_encoder
+from llm_code_lens.cli import _list_output_files
+from llm_code_lens.utils.gitignore import GitignoreParser, FastPathFilter
 
 def test_filtered_collect_files():
     """Test that filtered_collect_files correctly filters files based on include/exclude paths."""
@@ -133,6 +136,102 @@ def test_should_ignore():
     assert should_ignore(Path("/path/to/secret_file.txt"), custom_patterns) is True
     assert should_ignore(Path("/path/to/normal_file.txt"), custom_patterns) is False
 
+def test_gitignore_parser_matches_pathspec():
+    """Test that the compiled gitignore matchers agree with pathspec."""
+    lines = ["*.log", "build/", "/docs", "!keep.log", "a/**/b"]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".gitignore").write_text("\n".join(lines) + "\n")
+        parser = GitignoreParser(root)
+        parser.load_gitignore()
+        spec = pathspec.PathSpec.from_lines('gitwildmatch', lines)
+
+        for rel in ["app.log", "src/app.log", "keep.log", "build/out.o", "src/build/x",
+                    "docs/index.md", "src/docs/index.md", "a/x/y/b", "main.py"]:
+            assert parser.should_ignore(parser.root_path / rel) == spec.match_file(rel), rel
+
+        assert parser.should_ignore_directory(parser.root_path / "build") is True
+        assert parser.should_ignore_directory(parser.root_path / "src") is False
+        # Paths outside the root are never ignored
+        assert parser.should_ignore(Path(tmpdir).parent / "other.log") is False
+
+def test_gitignore_parser_negation_order():
+    """Test that the combined matchers still let the last matching pattern win."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".gitignore").write_text("# logs\n\n*.log\n!keep*.log\nkeep_not.log\n")
+        parser = GitignoreParser(root)
+        parser.load_gitignore()
+
+        assert parser.get_ignore_patterns() == ["*.log", "!keep*.log", "keep_not.log"]
+
+        assert parser.match_relative("app.log") is True
+        assert parser.match_relative("keep.log") is False
+        assert parser.match_relative("keep_not.log") is True
+        assert parser.match_relative("main.py") is False
+
+def test_gitignore_parser_caches_directory_verdicts():
+    """Test that files under ignored directories reuse the cached directory verdict."""
+    lines = ["build/", "*.tmp", "/docs", "foo/**/bar"]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".gitignore").write_text("\n".join(lines) + "\n")
+        parser = GitignoreParser(root)
+        parser.load_gitignore()
+        spec = pathspec.PathSpec.from_lines('gitwildmatch', lines)
+
+        for rel in ["build/a.o", "build/sub/b.o", "src/build/c.o", "src/main.py",
+                    "x.tmp/inner.py", "docs/a/b.md", "src/docs/a.md", "foo/x/bar/y.py"]:
+            assert parser.should_ignore(parser.root_path / rel) == spec.match_file(rel), rel
+
+        assert parser._dir_cache["build/sub"] is True
+        assert parser._dir_cache["src"] is False
+
+def test_gitignore_parser_bare_name_patterns():
+    """Test that top-level names skip patterns that need a directory component."""
+    lines = ["*.log", "src/*.tmp", "**/cache", "a/**/b", "**/", "!keep.log"]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".gitignore").write_text("\n".join(lines) + "\n")
+        parser = GitignoreParser(root)
+        parser.load_gitignore()
+        spec = pathspec.PathSpec.from_lines('gitwildmatch', lines)
+
+        assert len(parser._bare_matchers) == 4
+        for rel in ["app.log", "keep.log", "cache", "x.tmp", "src/x.tmp", "a/b",
+                    "a/c/b", "src/cache", "main.py", "src/main.py"]:
+            assert parser.match_relative(rel) == spec.match_file(rel), rel
+
+def test_gitignore_parsers_share_compiled_patterns():
+    """Test that parsers loading the same patterns reuse one compiled spec."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".gitignore").write_text("*.pyc\nbuild/\n")
+        first = GitignoreParser(root)
+        first.load_gitignore()
+        second = GitignoreParser(root)
+        second.load_gitignore()
+
+        assert second.spec is first.spec
+        assert second._include_regex is first._include_regex
+
+def test_fast_path_filter():
+    """Test FastPathFilter with gitignore, common excludes and custom patterns."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".gitignore").write_text("*.log\ngenerated/\n")
+        path_filter = FastPathFilter(root, ["*.bak", "scratch/"])
+        base = path_filter.root_path
+
+        assert path_filter.should_ignore_directory(base / "node_modules") is True
+        assert path_filter.should_ignore_directory(base / "generated") is True
+        assert path_filter.should_ignore_directory(base / "scratch") is True
+        assert path_filter.should_ignore_directory(base / "src") is False
+        assert path_filter.should_ignore_file(base / "src" / "app.log") is True
+        assert path_filter.should_ignore_file(base / "src" / "app.py.bak") is True
+        assert path_filter.should_ignore_file(base / "src" / "app.py") is False
+        assert path_filter.should_ignore_file(base.parent / "elsewhere.bak") is False
+
 def test_is_binary():
     """Test is_binary function."""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -169,12 +268,19 @@ def test_split_by_lines():
     # Test with empty content
     assert _split_by_lines("") == [""]
 
+@pytest.fixture
+def fresh_encoder_cache():
+    """Drop the cached tiktoken encoder so patched get_encoding calls take effect."""
+    _get_encoder.cache_clear()
+    yield
+    _get_encoder.cache_clear()
+
 @patch('tiktoken.get_encoding')
-def test_split_content_by_tokens(mock_get_encoding):
+def test_split_content_by_tokens(mock_get_encoding, fresh_encoder_cache):
     """Test split_content_by_tokens function."""
     # Mock the encoder
     mock_encoder = MagicMock()
-    mock_encoder.encode.return_value = list(range(1000))  # 1000 tokens
+    mock_encoder.encode_ordinary.return_value = list(range(1000))  # 1000 tokens
     mock_encoder.decode.side_effect = lambda tokens: f"Chunk with {len(tokens)} tokens"
     mock_get_encoding.return_value = mock_encoder
     
@@ -189,15 +295,45 @@ def test_split_content_by_tokens(mock_get_encoding):
     
     # Test with empty content
     assert split_content_by_tokens("") == [""]
+
+    # The encoder is loaded once and reused
+    split_content_by_tokens(content, chunk_size=500)
+    mock_get_encoding.assert_called_once()
     
     # Test with exception (should fall back to line-based splitting)
     mock_get_encoding.side_effect = Exception("Test error")
+    _get_encoder.cache_clear()
     with patch('llm_code_lens.cli._split_by_lines') as mock_split_lines:
         mock_split_lines.return_value = ["Fallback chunk"]
         chunks = split_content_by_tokens("Test content")
         assert chunks == ["Fallback chunk"]
         mock_split_lines.assert_called_once()
 
+def test_split_content_by_tokens_fills_chunks_across_slices():
+    """Test that token windows span the internal character slices."""
+    class CharEncoder:
+        def encode_ordinary(self, text):
+            return [ord(c) for c in text]
+
+        def decode(self, tokens):
+            return ''.join(map(chr, tokens))
+
+    content = 'abcdefghij' * 25000  # 250k chars, encoded in three slices
+    chunks = split_content_by_tokens(content, chunk_size=70000, encoder=CharEncoder())
+
+    assert [len(chunk) for chunk in chunks] == [70000, 70000, 70000, 40000]
+    assert ''.join(chunks) == content
+
+def test_list_output_files(tmp_path):
+    """_list_output_files lists regular prefix*.txt files, sorted by name."""
+    for name in ("full_2.txt", "full_1.txt", "sql_full_1.txt", "full_1.md", "analysis.txt"):
+        (tmp_path / name).write_text("x")
+    (tmp_path / "full_dir.txt").mkdir()
+
+    assert _list_output_files(tmp_path, "full_") == [tmp_path / "full_1.txt", tmp_path / "full_2.txt"]
+    assert _list_output_files(tmp_path, "sql_full_") == [tmp_path / "sql_full_1.txt"]
+    assert _list_output_files(tmp_path / "missing", "full_") == []
+
 def test_delete_and_create_output_dir():
     """Test delete_and_create_output_dir function."""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -214,6 +350,8 @@ def test_delete_and_create_output_dir():
         menu_state_file = menu_state_dir / "menu_state.json"
         menu_state_data = '{"test": "data"}'
         menu_state_file.write_text(menu_state_data)
+        cache_file = output_dir / "cache.sqlite"
+        cache_file.write_bytes(b"cache")
         
         # Delete and recreate
         delete_and_create_output_dir(output_dir)
@@ -227,6 +365,7 @@ def test_delete_and_create_output_dir():
         # Menu state file should be preserved
         assert menu_state_file.exists()
         assert menu_state_file.read_text() == menu_state_data
+        assert cache_file.read_bytes() == b"cache"
         
         # Test with non-existent directory
         new_dir = root / "new_dir"
@@ -468,8 +607,5 @@ def test_main_function_structure():
     # This is a simplified test to ensure the main function exists
     # We're not testing the actual execution or parameters since Click decorates the function
     
-    # Import the main function to verify it exists
-    from llm_code_lens.cli import main
-    
     # Check that it's a function
     assert callable(main)
@@ -100,6 +100,20 @@ def test_sql_format():
     assert 'test_proc' in formatted
     assert 'param1' in formatted
 
+def test_sql_format_large_codebase_groups_by_type():
+    """Test that large codebases list SQL objects grouped by type."""
+    analysis = {
+        'type': 'sql',
+        'objects': [{'type': 'procedure', 'name': f'proc{i}'} for i in range(5)] +
+                   [{'type': 'view', 'name': 'v_users'}]
+    }
+
+    formatted = '\n'.join(_format_sql_file(analysis, is_large_codebase=True))
+    assert 'PROCEDURES: 5' in formatted
+    assert '... and 2 more' in formatted
+    assert 'VIEWS: 1' in formatted
+    assert 'v_users' in formatted
+
 
 def test_format_analysis_empty_result():
     """Test formatting with minimal/empty analysis result."""
@@ -9,6 +9,7 @@ import os
 import sys
 import json
 import curses
+import threading
 from unittest.mock import patch, MagicMock
 from llm_code_lens.menu import MenuState, run_menu, draw_menu, handle_input
 
@@ -130,19 +131,22 @@ def test_menu_state_toggle_dir_expanded():
         # Initially not expanded
         assert str(test_dir) not in state.expanded_dirs
         
-        # Mock rebuild_visible_items to avoid implementation details
+        (test_dir / "child.txt").write_text("test")
+
+        # Visible directories are expanded in place, without a full rebuild
         state.rebuild_visible_items = MagicMock()
         
         # Toggle expansion
         state.toggle_dir_expanded(test_dir)
         assert str(test_dir) in state.expanded_dirs
-        state.rebuild_visible_items.assert_called_once()
+        assert (test_dir / "child.txt", 2) in state.visible_items
+        state.rebuild_visible_items.assert_not_called()
         
         # Toggle again
-        state.rebuild_visible_items.reset_mock()
         state.toggle_dir_expanded(test_dir)
         assert str(test_dir) not in state.expanded_dirs
-        state.rebuild_visible_items.assert_called_once()
+        assert (test_dir / "child.txt", 2) not in state.visible_items
+        state.rebuild_visible_items.assert_not_called()
 
 def test_menu_state_move_cursor():
     """Test cursor movement."""
@@ -276,6 +280,31 @@ def test_run_menu(mock_wrapper):
     # Verify results
     assert results == expected_results
 
+@patch('llm_code_lens.menu.draw_menu')
+@patch('curses.curs_set')
+@patch('curses.wrapper')
+def test_run_menu_skips_redraw_on_idle_poll(mock_wrapper, mock_curs_set, mock_draw, tmp_path):
+    """Test that poll timeouts during the background scan do not redraw the screen."""
+    states = []
+
+    def fake_start_auto_select(self):
+        self.scanning_in_progress = True
+        states.append(self)
+
+    def getch_keys():
+        yield -1  # Scan still running: no redraw
+        yield -1
+        states[0].scanning_in_progress = False
+        yield -1  # Scan finished: redraw once
+        yield 10  # Enter
+
+    keys = getch_keys()
+    mock_wrapper.side_effect = lambda func: func(MagicMock(getch=lambda: next(keys)))
+    with patch.object(MenuState, 'start_auto_select', fake_start_auto_select):
+        run_menu(tmp_path)
+
+    assert mock_draw.call_count == 2
+
 @patch('curses.wrapper')
 def test_run_menu_exception(mock_wrapper):
     """Test run_menu error handling."""
@@ -551,3 +580,555 @@ def test_menu_state_exclude_patterns():
         state.status_message = ""
         state.remove_exclude_pattern(99)
         assert state.status_message == ""  # Should not change
+
+def test_menu_state_build_item_list_order():
+    """Test that expanded directories list their children in depth-first order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a_dir" / "nested").mkdir(parents=True)
+        (root / "a_dir" / "nested" / "deep.txt").write_text("test")
+        (root / "a_dir" / "inner.txt").write_text("test")
+        (root / "z_file.txt").write_text("test")
+
+        state = MenuState(root)
+        state.expanded_dirs.update({str(root), str(root / "a_dir"), str(root / "a_dir" / "nested")})
+        state.rebuild_visible_items()
+
+        assert state._row_paths == [str(path) for path, _ in state.visible_items]
+        assert state._row_is_dir == [path.is_dir() for path, _ in state.visible_items]
+        assert state._row_excluded == [state.is_excluded(path) for path, _ in state.visible_items]
+
+        names = [(path.name, depth) for path, depth in state.visible_items[1:]]
+        assert names == [
+            ("a_dir", 1),
+            ("nested", 2),
+            ("deep.txt", 3),
+            ("inner.txt", 2),
+            ("z_file.txt", 1),
+        ]
+
+def test_menu_state_is_excluded_cache_invalidation():
+    """Test that cached exclusion results are dropped when gitignore support is toggled."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".gitignore").write_text("ignored.txt\n")
+        (root / "ignored.txt").write_text("test")
+
+        state = MenuState(root)
+        ignored = root / "ignored.txt"
+
+        assert state.is_excluded(ignored) is True
+        assert state._excluded_cache[str(ignored)] is True
+
+        state.toggle_option('respect_gitignore')
+        assert state.is_excluded(ignored) is False
+
+        state.toggle_option('respect_gitignore')
+        assert state.is_excluded(ignored) is True
+
+def test_menu_state_expanded_rows():
+    """Test that expanded directories are tracked by their visible row index."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "dir1").mkdir()
+        (root / "dir2").mkdir()
+        (root / "dir1" / "file1.txt").write_text("test")
+
+        state = MenuState(root)
+        state.expanded_dirs.add(str(root / "dir1"))
+        state.rebuild_visible_items()
+
+        expanded = {state.visible_items[idx][0] for idx in state._expanded_rows}
+        assert expanded == {root, root / "dir1"}
+
+        state.toggle_dir_expanded(root / "dir1")
+        expanded = {state.visible_items[idx][0] for idx in state._expanded_rows}
+        assert expanded == {root}
+
+def test_menu_state_auto_select_files():
+    """Test that auto-selection picks code files and skips excluded subtrees."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "src").mkdir()
+        (root / "src" / "main.py").write_text("print('hi')")
+        (root / "src" / "image.png").write_bytes(b"")
+        (root / "node_modules" / "pkg").mkdir(parents=True)
+        (root / "node_modules" / "pkg" / "index.js").write_text("")
+        deep = root.joinpath("a", "b", "c", "d", "e", "f")
+        deep.mkdir(parents=True)
+        (deep / "too_deep.py").write_text("")
+
+        state = MenuState(root)
+
+        assert str(root / "src") in state.selected_items
+        assert str(root / "src" / "main.py") in state.selected_items
+        assert str(root / "src" / "image.png") not in state.selected_items
+        assert not any("node_modules" in item for item in state.selected_items)
+        assert str(deep / "too_deep.py") not in state.selected_items
+
+def test_menu_state_dirty_structure():
+    """Test that structure changes mark visible items for rebuild."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "file1.txt").write_text("test")
+
+        state = MenuState(root)
+        assert state.dirty_structure is False
+
+        # Selection changes don't require a rebuild
+        state.toggle_selection(root / "file1.txt")
+        assert state.dirty_structure is False
+
+        # Changing ignore rules does
+        state.toggle_option('respect_gitignore')
+        assert state.dirty_structure is True
+
+        state.rebuild_visible_items()
+        assert state.dirty_structure is False
+
+def test_menu_state_is_excluded_cache_bounded():
+    """Test that the exclusion cache is not filled by auto-selection and stays bounded."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "src").mkdir()
+        (root / "src" / "main.py").write_text("")
+
+        state = MenuState(root)
+        assert str(root / "src" / "main.py") not in state._excluded_cache
+
+        for i in range(5000):
+            state.is_excluded(root / f"file{i}.txt")
+        assert len(state._excluded_cache) <= 4096
+
+def test_menu_state_common_exclude_globs():
+    """Test that wildcard entries in common_excludes are honoured."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "node_modules").mkdir()
+        (root / "cmake-build-debug").mkdir()
+        (root / "cmake-build-debug" / "output.txt").write_text("")
+        (root / "src").mkdir()
+
+        state = MenuState(root)
+
+        assert state.is_excluded(root / "node_modules")
+        assert state.is_excluded(root / "cmake-build-debug")
+        assert state.is_excluded(root / "cmake-build-debug" / "output.txt")
+        assert not state.is_excluded(root / "src")
+
+def test_menu_state_toggle_dir_expanded_matches_rebuild():
+    """Test that in-place expansion produces the same rows as a full rebuild."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a_dir" / "nested").mkdir(parents=True)
+        (root / "a_dir" / "nested" / "deep.txt").write_text("test")
+        (root / "a_dir" / "inner.txt").write_text("test")
+        (root / "b_dir").mkdir()
+        (root / "b_dir" / "other.txt").write_text("test")
+        (root / "z_file.txt").write_text("test")
+
+        state = MenuState(root)
+        # A nested directory that was expanded earlier reappears with its parent
+        state.expanded_dirs.add(str(root / "a_dir" / "nested"))
+        state.toggle_dir_expanded(root / "b_dir")
+        state.toggle_dir_expanded(root / "a_dir")
+
+        # The path -> row map is kept current across splices
+        assert state._path_to_visible_idx == {p: i for i, p in enumerate(state._row_paths)}
+
+        spliced = (list(state.visible_items), list(state._row_paths), list(state._row_is_dir),
+                   list(state._row_excluded), set(state._expanded_rows))
+        state.rebuild_visible_items()
+        assert spliced == (state.visible_items, state._row_paths, state._row_is_dir,
+                           state._row_excluded, state._expanded_rows)
+
+        state.toggle_dir_expanded(root / "a_dir")
+        assert state.find_visible_index(str(root / "b_dir" / "other.txt")) == state._row_paths.index(
+            str(root / "b_dir" / "other.txt"))
+        assert state._path_to_visible_idx == {p: i for i, p in enumerate(state._row_paths)}
+        spliced = (list(state.visible_items), set(state._expanded_rows))
+        state.rebuild_visible_items()
+        assert spliced == (state.visible_items, state._expanded_rows)
+
+def test_menu_state_row_excluded_for_excluded_root():
+    """Test that an excluded root row is flagged as excluded."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "build"
+        root.mkdir()
+
+        state = MenuState(root)
+
+        assert state.visible_items == [(root.resolve(), 0)]
+        assert state._row_excluded == [True]
+
+def test_menu_state_background_auto_select():
+    """Test that deferred auto-selection runs on a background thread."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "main.py").write_text("")
+
+        state = MenuState(root, defer_auto_select=True)
+        assert state.selected_items == set()
+
+        state.start_auto_select()
+        state.wait_for_auto_select()
+
+        assert state.scanning_in_progress is False
+        assert str(root / "main.py") in state.selected_items
+
+def test_menu_state_background_auto_select_merges_on_ui_thread():
+    """Test that the worker keeps its own gitignore parser and only the UI thread merges."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "main.py").write_text("")
+
+        state = MenuState(root, defer_auto_select=True)
+        parser = state.gitignore_parser
+        assert parser is not None
+
+        release = threading.Event()
+        scanned_with = []
+        original_scan = state._scan_auto_selection
+
+        def blocked_scan(gitignore_parser, cancel=None):
+            release.wait(5)
+            scanned_with.append(gitignore_parser)
+            return original_scan(gitignore_parser, cancel)
+
+        state._scan_auto_selection = blocked_scan
+        state.start_auto_select()
+
+        # Disabling gitignore mid-scan must not affect the running worker
+        state.toggle_option('respect_gitignore')
+        assert state.gitignore_parser is None
+        release.set()
+        state._auto_select_thread.join()
+
+        # The worker only hands its result over; the selection is untouched until merged
+        assert state.selected_items == set()
+        assert state.scanning_in_progress is True
+        assert state.merge_auto_select() is True
+        assert scanned_with == [parser]
+        assert str(root / "main.py") in state.selected_items
+        assert state.scanning_in_progress is False
+        assert state.merge_auto_select() is False
+
+@patch('llm_code_lens.menu.draw_menu')
+@patch('curses.curs_set')
+@patch('curses.wrapper')
+def test_run_menu_cancel_does_not_wait_for_scan(mock_wrapper, mock_curs_set, mock_draw, tmp_path):
+    """Test that cancelling the menu returns while the auto-selection is still running."""
+    import time
+    (tmp_path / "main.py").write_text("")
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked_scan(self, gitignore_parser, cancel=None):
+        started.set()
+        release.wait(10)
+        return {str(tmp_path / "main.py")}, None
+
+    def getch_keys():
+        started.wait(5)
+        yield ord('q')
+
+    keys = getch_keys()
+    mock_wrapper.side_effect = lambda func: func(MagicMock(getch=lambda: next(keys)))
+    try:
+        with patch.object(MenuState, '_scan_auto_selection', blocked_scan):
+            start = time.monotonic()
+            results = run_menu(tmp_path)
+            elapsed = time.monotonic() - start
+    finally:
+        release.set()
+
+    assert results['cancelled'] is True
+    assert elapsed < 5
+    assert results['include_paths'] == [tmp_path]
+
+def test_menu_state_auto_select_stops_when_cancelled():
+    """Test that the walk gives up at the next directory once cancelled."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "main.py").write_text("")
+
+        state = MenuState(root, defer_auto_select=True)
+        cancel = threading.Event()
+        cancel.set()
+
+        assert state._scan_auto_selection(state.gitignore_parser, cancel) == (set(), "Auto-selection cancelled")
+        assert str(root / "main.py") in state._scan_auto_selection(state.gitignore_parser)[0]
+
+def test_menu_state_auto_select_respects_toggles_during_scan():
+    """Test that paths toggled while scanning keep the user's choice."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "main.py").write_text("")
+        (root / "other.py").write_text("")
+
+        state = MenuState(root, defer_auto_select=True)
+        state.scanning_in_progress = True
+
+        # Select then deselect while the scan is still running
+        state.toggle_selection(root / "main.py")
+        state.toggle_selection(root / "main.py")
+        state._auto_select_files()
+
+        assert str(root / "main.py") not in state.selected_items
+        assert str(root / "other.py") in state.selected_items
+
+def test_menu_state_validate_selection_counts():
+    """Test that validate_selection splits selected items into dirs and files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "src").mkdir()
+        (root / "src" / "deep").mkdir()
+        (root / "main.py").write_text("")
+
+        state = MenuState(root)
+        state.selected_items = {str(root / "src"), str(root / "src" / "deep"), str(root / "main.py")}
+
+        stats = state.validate_selection()
+
+        assert stats['selected_count'] == 3
+        assert sorted(stats['selected_dirs']) == sorted([str(root / "src"), str(root / "src" / "deep")])
+        assert stats['selected_files'] == [str(root / "main.py")]
+
+
+def test_menu_state_current_item_is_dir(tmp_path):
+    """Test that the cursor's directory flag comes from the cached row state."""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "file.txt").write_text("x")
+    state = MenuState(tmp_path)
+    state.rebuild_visible_items()
+
+    with patch.object(Path, 'is_dir', side_effect=AssertionError("stat")):
+        flags = []
+        for i in range(len(state.visible_items)):
+            state.cursor_pos = i
+            flags.append(state.current_item_is_dir())
+
+    assert flags == [True, True, False]
+
+
+def test_menu_state_options_layout_cache(tmp_path):
+    """Test that the options layout is cached and invalidated when options change."""
+    state = MenuState(tmp_path)
+
+    layout = state.get_options_layout()
+    assert len(layout) == 9
+    assert state.get_options_layout() is layout
+
+    state.add_exclude_pattern('*.log')
+    layout = state.get_options_layout()
+    assert layout[-1] == ("Exclude Pattern 1", "*.log", "Del")
+    assert state._total_options == 10
+
+    state.toggle_option('format')
+    assert state.get_options_layout()[0] == ("Format", state.options['format'], "F1")
+
+    state.option_cursor = 9
+    state.move_option_cursor(1)
+    assert state.option_cursor == 9
+
+    state.remove_exclude_pattern(0)
+    assert len(state.get_options_layout()) == 9
+    state.move_option_cursor(-1)
+    assert state.option_cursor == 8
+
+
+def test_menu_state_save_state_atomic(tmp_path):
+    """Test that saving state replaces the file atomically and round-trips."""
+    (tmp_path / "file1.txt").write_text("x")
+    state1 = MenuState(tmp_path)
+    state1.selected_items = {str(tmp_path / "file1.txt")}
+    state1.options['format'] = 'json'
+    with patch('llm_code_lens.menu.msgpack', None):
+        state1._save_state()
+
+        state_dir = tmp_path / '.codelens'
+        assert sorted(p.name for p in state_dir.iterdir()) == ['menu_state.json']
+        saved = json.loads((state_dir / 'menu_state.json').read_text(encoding='utf-8'))
+        assert saved['selected_items'] == [str(tmp_path / "file1.txt")]
+
+        state2 = MenuState(tmp_path)
+    assert state2.selected_items == {str(tmp_path / "file1.txt")}
+    assert state2.options['format'] == 'json'
+
+
+def test_menu_state_msgpack_migrates_json_state(tmp_path):
+    """Test that a legacy JSON state is loaded and migrated to msgpack on save."""
+    pytest.importorskip('msgpack')
+    (tmp_path / "file1.txt").write_text("x")
+    state_dir = tmp_path / '.codelens'
+    state_dir.mkdir()
+    (state_dir / 'menu_state.json').write_text(json.dumps({
+        'expanded_dirs': [str(tmp_path)],
+        'selected_items': [str(tmp_path / "file1.txt")],
+        'options': {'format': 'json'}
+    }))
+
+    state1 = MenuState(tmp_path)
+    assert state1.selected_items == {str(tmp_path / "file1.txt")}
+    state1._save_state()
+    assert sorted(p.name for p in state_dir.iterdir()) == ['menu_state.mpk']
+
+    state2 = MenuState(tmp_path)
+    assert state2.selected_items == {str(tmp_path / "file1.txt")}
+    assert state2.options['format'] == 'json'
+
+
+def test_menu_state_iter_viewport(tmp_path):
+    """Test that only the rows inside the scroll window are yielded."""
+    for i in range(10):
+        (tmp_path / f"file{i}.txt").write_text("x")
+    state = MenuState(tmp_path)
+    state.rebuild_visible_items()
+    state.max_visible = 4
+    state.scroll_offset = 3
+
+    rows = list(state.iter_viewport())
+    assert [row[0] for row in rows] == [3, 4, 5, 6]
+    assert [(row[1], row[2]) for row in rows] == state.visible_items[3:7]
+    assert [row[3] for row in rows] == state._row_paths[3:7]
+
+    state.scroll_offset = 9
+    assert [row[0] for row in state.iter_viewport()] == [9, 10]
+    assert state._excluded_row_count == sum(state._row_excluded)
+
+
+def test_menu_state_find_visible_index(tmp_path):
+    """Test path to row index lookups, including after an in-place splice."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "inner.txt").write_text("x")
+    (tmp_path / "b.txt").write_text("x")
+    state = MenuState(tmp_path)
+    state.rebuild_visible_items()
+    root = tmp_path.resolve()
+
+    assert state.find_visible_index(str(root / "b.txt")) == 2
+    assert state.find_visible_index(str(root / "a" / "inner.txt")) is None
+
+    state.toggle_dir_expanded(root / "a")
+    assert state.find_visible_index(str(root / "a" / "inner.txt")) == 2
+    assert state.find_visible_index(str(root / "b.txt")) == 3
+
+    # KEY_LEFT on an already collapsed directory jumps to its parent row
+    state.cursor_pos = 1
+    state.toggle_dir_expanded(root / "a")
+    handle_input(curses.KEY_LEFT, state)
+    assert state.cursor_pos == 0
+
+
+def test_handle_input_llm_provider_cycle(tmp_path):
+    """Test that F7 and the options entry cycle providers through toggle_option."""
+    state = MenuState(tmp_path)
+    state.options['custom_llm_url'] = 'http://localhost:8080'
+    seen = []
+    for _ in range(5):
+        handle_input(curses.KEY_F7, state)
+        seen.append(state.options['llm_provider'])
+    assert seen == ['chatgpt', 'gemini', 'custom', 'none', 'claude']
+
+    state.options['llm_provider'] = 'local'
+    state.active_section = 'options'
+    state.option_cursor = 6
+    handle_input(ord(' '), state)
+    assert state.options['llm_provider'] == 'none'
+    assert state.get_options_layout()[6][1] == 'none'
+
+
+def test_menu_state_options_lines_cache(tmp_path):
+    """Test that formatted option rows are reused until options or width change."""
+    state = MenuState(tmp_path)
+
+    lines = state.get_options_lines(80)
+    assert len(lines) == 9
+    assert lines[0].startswith(" Format: txt") and lines[0].endswith("[F1]")
+    assert all(len(line) <= 78 for line in lines)
+    assert state.get_options_lines(80) is lines
+
+    narrow = state.get_options_lines(20)
+    assert narrow is not lines
+    assert all(len(line) <= 18 for line in narrow)
+
+    state.toggle_option('format')
+    assert state.get_options_lines(20)[0].startswith(" Format: json")
+
+
+def test_menu_state_edit_buffer_chars(tmp_path):
+    """Test that the edit buffer appends and deletes whole characters."""
+    state = MenuState(tmp_path)
+    state.options['sql_database'] = 'données'
+    state.start_editing_option('sql_database')
+
+    handle_input(127, state)  # Backspace
+    handle_input(127, state)
+    assert state.edit_buffer == 'donné'
+
+    handle_input(127, state)
+    handle_input(ord('e'), state)
+    handle_input(10, state)  # Enter
+    assert state.options['sql_database'] == 'donne'
+    assert state.edit_buffer == ''
+
+    state.edit_backspace()  # No-op on an empty buffer
+    assert state.edit_buffer == ''
+
+
+def test_menu_state_save_state_skips_unchanged(tmp_path):
+    """Test that saving unchanged state does not rewrite the state file."""
+    (tmp_path / "file1.txt").write_text("x")
+    state1 = MenuState(tmp_path)
+    state1._save_state()
+
+    state2 = MenuState(tmp_path)
+    with patch('llm_code_lens.menu.os.replace') as mock_replace:
+        state2._save_state()
+        mock_replace.assert_not_called()
+
+        state2.toggle_selection(tmp_path.resolve() / "file1.txt")
+        state2._save_state()
+        mock_replace.assert_called_once()
+
+
+def test_menu_state_get_results_collapses_nested_selection(tmp_path):
+    """Test that paths under a selected directory are not repeated in include_paths."""
+    root = tmp_path.resolve()
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "pkg" / "mod.py").write_text("x")
+    (root / "src-extra.py").write_text("x")
+    (root / "docs").mkdir()
+    (root / "docs" / "guide.md").write_text("x")
+    state = MenuState(root)
+    state.selected_items = {
+        str(root / "src"), str(root / "src" / "pkg"), str(root / "src" / "pkg" / "mod.py"),
+        str(root / "src-extra.py"), str(root / "docs" / "guide.md"),
+    }
+
+    with patch.object(state, '_save_state'):
+        results = state.get_results()
+
+    assert results['include_paths'] == sorted(
+        [root / "docs" / "guide.md", root / "src", root / "src-extra.py"], key=str)
+
+
+def test_menu_state_invalid_provider_logged_not_printed(tmp_path, capsys, caplog):
+    """Test that provider migration notes go to the logger instead of stdout."""
+    with caplog.at_level('DEBUG', logger='llm_code_lens.menu'):
+        state = MenuState(tmp_path, {'llm_provider': 'bogus'})
+
+    assert state.options['llm_provider'] == 'claude'
+    assert capsys.readouterr().out == ''
+    assert "Invalid provider 'bogus'" in caplog.text
+
+
+def test_menu_state_path_strings_interned(tmp_path):
+    """Test that row paths and selected paths are the same interned string objects."""
+    (tmp_path / "main.py").write_text("x")
+    state = MenuState(tmp_path)
+    state.rebuild_visible_items()
+
+    row_path = state._row_paths[state.find_visible_index(str(tmp_path.resolve() / "main.py"))]
+    selected_path = next(p for p in state.selected_items if p == row_path)
+    assert selected_path is row_path
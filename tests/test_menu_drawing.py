@@ -10,6 +10,7 @@ import sys
 import curses
 from unittest.mock import patch, MagicMock, call
 from llm_code_lens.menu import MenuState, draw_menu
+import llm_code_lens.menu as menu_module
 
 @patch('curses.curs_set')
 @patch('curses.start_color')
@@ -156,3 +157,125 @@ def test_draw_menu_editing_mode(mock_curs_set):
         move_args = stdscr.move.call_args[0]
         assert move_args[0] == 24  # Last row
         assert move_args[1] > 20  # After the prompt
+
+@patch('curses.curs_set')
+@patch('curses.start_color')
+@patch('curses.init_pair')
+def test_draw_menu_colors_initialized_once(mock_init_pair, mock_start_color, mock_curs_set):
+    """Test that color pairs are only set up on the first frame."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        state = MenuState(root)
+
+        stdscr = MagicMock()
+        stdscr.getmaxyx.return_value = (25, 80)
+
+        try:
+            draw_menu(stdscr, state)
+        except curses.error:
+            pass
+        draw_calls = mock_init_pair.call_count
+        assert state.colors_initialized
+
+        try:
+            draw_menu(stdscr, state)
+        except curses.error:
+            pass
+
+        mock_start_color.assert_called_once()
+        assert mock_init_pair.call_count == draw_calls
+
+@patch('curses.curs_set')
+@patch('curses.start_color')
+@patch('curses.init_pair')
+@patch('curses.color_pair', side_effect=lambda n: n << 8)
+def test_draw_menu_color_attrs_cached(mock_color_pair, mock_init_pair, mock_start_color, mock_curs_set):
+    """Test that color pair attributes are resolved once and reused by later frames."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        state = MenuState(root)
+
+        stdscr = MagicMock()
+        stdscr.getmaxyx.return_value = (25, 80)
+
+        draw_menu(stdscr, state)
+        assert state.color_attrs['header'] == 1 << 8
+        assert state.color_attrs['included_bold'] == (3 << 8) | curses.A_BOLD
+
+        mock_color_pair.reset_mock()
+        draw_menu(stdscr, state)
+        mock_color_pair.assert_not_called()
+
+@patch('curses.curs_set')
+@patch('curses.start_color')
+@patch('curses.init_pair')
+@patch('curses.color_pair', side_effect=lambda n: n << 8)
+def test_draw_menu_row_indicators_and_attrs(mock_color_pair, mock_init_pair, mock_start_color, mock_curs_set):
+    """Test the indicator and attribute chosen for each file row state."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        (root / "sub").mkdir()
+        (root / "a.txt").write_text("a")
+        (root / "b.txt").write_text("b")
+        state = MenuState(root)
+        state.selected_items = {str(root / "sub"), str(root / "a.txt")}
+        state.cursor_pos = 0
+
+        stdscr = MagicMock()
+        stdscr.getmaxyx.return_value = (25, 80)
+        draw_menu(stdscr, state)
+
+        rows = {args[2].split("] ")[-1]: (args[2], args[3]) for args, _ in stdscr.addstr.call_args_list
+                if len(args) == 4 and 2 <= args[0] < 6}
+        assert "[*]" in rows["sub"][0] and rows["sub"][1] == 5 << 8
+        assert "[*]" in rows["a.txt"][0] and rows["a.txt"][1] == (3 << 8) | curses.A_BOLD
+        assert "[ ]" in rows["b.txt"][0] and rows["b.txt"][1] == 0
+
+@patch('curses.curs_set')
+@patch('curses.start_color')
+@patch('curses.init_pair')
+@patch('curses.color_pair', side_effect=lambda n: n << 8)
+def test_draw_menu_status_line_cached(mock_color_pair, mock_init_pair, mock_start_color, mock_curs_set):
+    """Test that the status line is only reformatted when its inputs change."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        state = MenuState(root)
+        state.status_message = "Ready"
+
+        stdscr = MagicMock()
+        stdscr.getmaxyx.return_value = (25, 80)
+
+        with patch('llm_code_lens.menu._format_status_line', wraps=menu_module._format_status_line) as mock_format:
+            draw_menu(stdscr, state)
+            draw_menu(stdscr, state)
+            assert mock_format.call_count == 1
+
+            state.status_message = "Changed"
+            draw_menu(stdscr, state)
+            assert mock_format.call_count == 2
+
+        status_calls = [args for args, _ in stdscr.addstr.call_args_list if args[0] == 24]
+        assert status_calls[-1][2].startswith(" Changed ")
+        assert len(status_calls[-1][2]) == 79
+
+@patch('curses.curs_set')
+@patch('curses.start_color')
+@patch('curses.init_pair')
+@patch('curses.color_pair', side_effect=lambda n: n << 8)
+def test_draw_menu_chrome_cached_per_width(mock_color_pair, mock_init_pair, mock_start_color, mock_curs_set):
+    """Test that centered header strings are cached per width and section."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = MenuState(Path(tmpdir))
+        stdscr = MagicMock()
+
+        stdscr.getmaxyx.return_value = (25, 80)
+        draw_menu(stdscr, state)
+        draw_menu(stdscr, state)
+        assert list(state._chrome_cache) == [(80, 'files')]
+        header = stdscr.addstr.call_args_list[0][0][2]
+        assert len(header) == 79 and "File Selection" in header
+
+        stdscr.getmaxyx.return_value = (25, 60)
+        draw_menu(stdscr, state)
+        assert (60, 'files') in state._chrome_cache
+        assert len(state._chrome_cache[(60, 'files')][0]) == 59
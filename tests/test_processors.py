@@ -1,11 +1,13 @@
 import pytest
+from pathlib import Path
 from llm_code_lens.processors.insights import generate_insights
 from llm_code_lens.processors.summary import (
     generate_summary, _process_file_stats, _process_code_metrics,
-    _process_maintenance_info, _process_structure_info,
+    _process_maintenance_info, _process_structure_info, _split_path,
     _calculate_final_metrics, _estimate_todo_priority,
     _is_potential_entry_point, _is_core_file
 )
+from llm_code_lens.utils import estimate_todo_priority
 
 def test_generate_summary():
     """Test basic summary generation."""
@@ -64,6 +66,14 @@ def test_generate_insights():
     assert any('TODO' in insight for insight in insights)
 
 
+def test_generate_insights_complex_functions():
+    """Test that complex functions are named when few and counted when many."""
+    few = {'a.py': {'functions': [{'name': 'slow', 'complexity': 10}]}}
+    assert "Complex functions detected: slow in a.py" in generate_insights(few)
+
+    many = {'a.py': {'functions': [{'name': f'f{i}', 'loc': 60} for i in range(40)]}}
+    assert "Found 40 complex functions that might need attention" in generate_insights(many)
+
 def test_process_file_stats_empty():
     """Test file stats processing with empty analysis."""
     summary = {
@@ -76,6 +86,11 @@ def test_process_file_stats_empty():
     assert '.py' in summary['project_stats']['by_type']
     assert summary['project_stats']['by_type']['.py'] == 1
 
+def test_split_path_matches_pathlib():
+    """Test that the string path split agrees with Path.parent and Path.suffix."""
+    for file_path in ['a.py', 'src/a.py', '/x/y.tar.gz', '.bashrc', 'dir/file.', 'Makefile']:
+        assert _split_path(file_path) == (str(Path(file_path).parent), Path(file_path).suffix)
+
 def test_process_code_metrics_edge_cases():
     """Test code metrics processing with edge cases."""
     summary = {
@@ -175,6 +190,11 @@ def test_estimate_todo_priority_variations():
     assert _estimate_todo_priority('Should improve this later') == 'medium'
     assert _estimate_todo_priority('Add more tests') == 'low'
 
+    # Results are memoized per TODO text
+    hits = estimate_todo_priority.cache_info().hits
+    assert _estimate_todo_priority('Add more tests') == 'low'
+    assert estimate_todo_priority.cache_info().hits == hits + 1
+
 def test_is_potential_entry_point_variations():
     """Test entry point detection with different variations."""
     # Test common entry point filenames
@@ -189,6 +209,10 @@ def test_is_potential_entry_point_variations():
     analysis = {'functions': [{'name': 'start'}]}
     assert _is_potential_entry_point('app.py', analysis)
 
+    # Nested paths are matched on the file name only
+    assert _is_potential_entry_point('src/pkg/main.py', {})
+    assert not _is_potential_entry_point('main.py/helpers.py', {})
+
 def test_is_core_file_variations():
     """Test core file detection with different criteria."""
     # Test function count threshold